@@ -0,0 +1,167 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+from flask import Blueprint, Response, jsonify, request
+
+from data_process1 import aggregate
+from metrics import timed
+from rollups import FREQS, METRICS
+
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+
+
+# LRU of serialized responses keyed by (granularity, from_date, to_date),
+# bounded by entry count and total body size. Each entry remembers the time
+# range its rows were computed from so a data change only evicts the entries
+# it can affect.
+class ResponseCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, etag, start, end):
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key)[0])
+            self._entries[key] = (body, etag, start, end)
+            self.size += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                _, (old_body, *_) = self._entries.popitem(last=False)
+                self.size -= len(old_body)
+
+    # Drops entries whose [start, end) range ends after changed_from
+    def invalidate(self, changed_from=None):
+        with self._lock:
+            stale = [key for key, (_, _, _, end) in self._entries.items()
+                     if changed_from is None or end > changed_from]
+            for key in stale:
+                self.size -= len(self._entries.pop(key)[0])
+            return len(stale)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# First timestamp from which new differs from old, or None when they are
+# identical. An append-only refresh changes nothing before old's last row.
+def changed_from(old, new, metrics=METRICS):
+    n = min(len(old), len(new))
+    same = np.ones(n, dtype=bool)
+    for col in ['timestamp'] + [m for m in metrics if m in old and m in new]:
+        a, b = old[col].values[:n], new[col].values[:n]
+        equal = a == b
+        if a.dtype.kind == 'f' and b.dtype.kind == 'f':
+            equal |= np.isnan(a) & np.isnan(b)
+        same &= equal
+    differs = np.flatnonzero(~same)
+    if len(differs):
+        return pd.Timestamp(min(old['timestamp'].values[differs[0]], new['timestamp'].values[differs[0]]))
+    if len(new) > n:
+        return pd.Timestamp(new['timestamp'].values[n])
+    if len(old) > n:
+        return pd.Timestamp(old['timestamp'].values[n])
+    return None
+
+
+# Aggregates over the latest snapshot, as JSON. get_frame returns the current
+# sorted frame (or None while loading); a new frame object is compared with
+# the previous one to invalidate the affected cache entries.
+class AggregateService:
+    def __init__(self, get_frame, timestamp_column='timestamp', cache=None):
+        self.get_frame = get_frame
+        self.timestamp_column = timestamp_column
+        self.cache = cache if cache is not None else ResponseCache()
+        self._source = None
+        self._frame = None
+        self._lock = threading.Lock()
+
+    def frame(self):
+        source = self.get_frame()
+        with self._lock:
+            if source is not self._source:
+                frame = None
+                if source is not None:
+                    frame = source.rename(columns={self.timestamp_column: 'timestamp'}, copy=False)
+                if self._frame is None or frame is None:
+                    self.cache.invalidate()
+                else:
+                    since = changed_from(self._frame, frame)
+                    if since is not None:
+                        self.cache.invalidate(since)
+                self._source, self._frame = source, frame
+            return self._frame
+
+    # (body, etag), serialized once per cache entry
+    @timed("aggregate_api")
+    def get(self, granularity, from_date, to_date):
+        df = self.frame()
+        if df is None:
+            return None
+        key = (granularity, from_date, to_date)
+        entry = self.cache.get(key)
+        if entry is None:
+            table = aggregate(df, from_date, to_date, [granularity])[granularity]
+            body = table.to_json(orient='records', date_format='iso', double_precision=15).encode()
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            entry = body, etag, pd.Timestamp(from_date), pd.Timestamp(to_date) + timedelta(days=1)
+            with self._lock:
+                # Skip caching if a newer snapshot arrived meanwhile
+                if self._frame is df:
+                    self.cache.put(key, *entry)
+        return entry[0], entry[1]
+
+
+# (from_date, to_date) as ISO dates from the 'from'/'to' query arguments;
+# raises ValueError with a message for the client
+def parse_date_range(args):
+    try:
+        from_date = parser.parse(args['from']).date().isoformat()
+        to_date = parser.parse(args['to']).date().isoformat()
+    except KeyError:
+        raise ValueError("Both 'from' and 'to' dates are required")
+    except (ValueError, OverflowError):
+        raise ValueError("Dates must look like YYYY-MM-DD")
+    if from_date > to_date:
+        raise ValueError("'from' is after 'to'")
+    return from_date, to_date
+
+
+def create_blueprint(service, max_age=60):
+    api = Blueprint('aggregate_api', __name__, url_prefix='/api')
+
+    # GET /api/aggregates/<hourly|daily|weekly|monthly>?from=YYYY-MM-DD&to=YYYY-MM-DD
+    @api.route('/aggregates/<granularity>')
+    def aggregates(granularity):
+        if granularity not in FREQS:
+            return jsonify(error=f"Unknown granularity '{granularity}'"), 404
+        try:
+            from_date, to_date = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+
+        result = service.get(granularity, from_date, to_date)
+        if result is None:
+            return jsonify(error="Data is still loading"), 503
+        body, etag = result
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.max_age = max_age
+        return response.make_conditional(request)
+
+    return api
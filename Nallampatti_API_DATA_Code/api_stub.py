@@ -0,0 +1,192 @@
+# Local stand-in for the sensor API (/get_token and /nallampatti_data; any
+# other /<station>_data path serves the same records unless records is a
+# {station: records} dict).
+# Run it directly and point API_URL at http://127.0.0.1:<port>, or start it
+# in-process with start_stub() from a script.
+
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = "%d-%b-%Y %H:%M:%S"
+SAMPLES_PER_DAY = 144
+# Timestamps seen from misbehaving loggers; preprocessing must drop them
+MALFORMED_TIMESTAMPS = ["", "NaN", "31-Foo-2024 25:61:00", "2024-10-01T00:00:00Z", "01/10/2024 10:00"]
+
+
+def make_records(n=1000, start=datetime(2024, 10, 1)):
+    records = []
+    for i in range(n):
+        ts = start + timedelta(minutes=10 * i)
+        records.append({
+            "timestamp": ts.strftime(DATE_FORMAT),
+            "FlowInd": round(5 + (i % 7) * 0.5, 2),
+            "Depth": round(40 + (i % 11), 2),
+            "TDS": 0 if i % 13 == 0 else 250 + i % 50,
+            "pH": 0 if i % 13 == 0 else round(7.5 + (i % 5) * 0.1, 2),
+        })
+    return records
+
+
+# Realistic 10-minute series: daily and seasonal cycles plus noise, outages
+# (gap_rate is the chance an outage starts at a sample; outages last about
+# six hours on average), TDS/pH dropouts reported as 0 and a few malformed
+# timestamps. The seed makes a station's series reproducible.
+def generate_records(days=30, start=datetime(2024, 1, 1), seed=0, gap_rate=0.001, zero_rate=0.02,
+                     malformed_rate=0.0005):
+    rng = np.random.default_rng(seed)
+    n = days * SAMPLES_PER_DAY
+    day = np.arange(n) / SAMPLES_PER_DAY
+    daily = np.sin(2 * np.pi * day)
+    seasonal = np.sin(2 * np.pi * day / 365.25)
+
+    flow = np.clip(6 + 2 * daily + rng.normal(0, 0.5, n), 0, None).round(2)
+    depth = np.clip(50 + 15 * seasonal + np.cumsum(rng.normal(0, 0.05, n)), 0, None).round(2)
+    tds = np.clip(300 - 60 * seasonal + rng.normal(0, 10, n), 0, None).round()
+    ph = (7.8 + 0.3 * daily + rng.normal(0, 0.05, n)).round(2)
+    zeros = rng.random(n) < zero_rate
+    tds[zeros] = 0
+    ph[zeros] = 0
+
+    keep = np.ones(n, dtype=bool)
+    outages = np.flatnonzero(rng.random(n) < gap_rate)
+    for first, length in zip(outages, rng.geometric(1 / 36, len(outages))):
+        keep[first:first + length] = False
+
+    timestamps = pd.date_range(start, periods=n, freq="10min").strftime(DATE_FORMAT).to_numpy(dtype=object)
+    malformed = np.flatnonzero(rng.random(n) < malformed_rate)
+    timestamps[malformed] = rng.choice(MALFORMED_TIMESTAMPS, len(malformed))
+
+    columns = zip(timestamps[keep].tolist(), flow[keep].tolist(), depth[keep].tolist(),
+                  tds[keep].astype(int).tolist(), ph[keep].tolist())
+    return [{"timestamp": ts, "FlowInd": f, "Depth": d, "TDS": t, "pH": p} for ts, f, d, t, p in columns]
+
+
+# {station: records}, each station with its own seed
+def generate_stations(names, days=30, **kwargs):
+    return {name: generate_records(days, seed=i, **kwargs) for i, name in enumerate(names)}
+
+
+def _records_after(records, since):
+    after = []
+    for r in records:
+        try:
+            if datetime.strptime(r["timestamp"], DATE_FORMAT) > since:
+                after.append(r)
+        except (TypeError, ValueError):
+            continue
+    return after
+
+
+# fail_rate is the fraction of data requests answered with a 503 and delay
+# the seconds each data request stalls; both can be changed while running to
+# simulate an unhealthy or cold-starting upstream.
+class StubState:
+    def __init__(self, records=None, token_ttl=900, delay=0.0, fail_rate=0.0):
+        self.records = records if records is not None else make_records()
+        self.token_ttl = token_ttl
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.tokens = set()
+        self.token_requests = 0
+        self.data_requests = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.path != "/get_token":
+            return self._send_json(404, {"error": "not found"})
+
+        token = uuid.uuid4().hex
+        with state.lock:
+            state.token_requests += 1
+            state.tokens.add(token)
+        self._send_json(200, {"token": token, "expires_in": state.token_ttl})
+
+    def do_GET(self):
+        state = self.server.state
+        path = self.path.split("?", 1)[0]
+        if not path.endswith("_data"):
+            return self._send_json(404, {"error": "not found"})
+        # Counted before failing, so callers can tell whether a request was sent at all
+        with state.lock:
+            state.data_requests += 1
+        if state.delay:
+            time.sleep(state.delay)
+        if state.fail_rate and random.random() < state.fail_rate:
+            return self._send_json(503, {"error": "service unavailable"})
+
+        token = self.headers.get("Authorization", "").replace("Bearer ", "", 1)
+        with state.lock:
+            authorized = token in state.tokens
+        if not authorized:
+            return self._send_json(401, {"error": "invalid token"})
+        records = state.records
+        if isinstance(records, dict):
+            records = records.get(path.rsplit("/", 1)[-1][:-len("_data")])
+            if records is None:
+                return self._send_json(404, {"error": "unknown station"})
+        since = parse_qs(urlparse(self.path).query).get("since")
+        if since:
+            self._send_json(200, _records_after(records, datetime.strptime(since[0], DATE_FORMAT)))
+        else:
+            self._send_json(200, records)
+
+
+def start_stub(records=None, host="127.0.0.1", port=0, token_ttl=900, delay=0.0, fail_rate=0.0):
+    httpd = ThreadingHTTPServer((host, port), StubHandler)
+    httpd.daemon_threads = True
+    httpd.state = StubState(records, token_ttl, delay, fail_rate)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd, f"http://{host}:{httpd.server_address[1]}"
+
+
+# Same as start_stub but served from a forked process, so the stub's own
+# allocations and CPU time do not show up in measurements of the client.
+# Stop it with process.terminate().
+def start_stub_process(records=None, host="127.0.0.1", port=0, token_ttl=900, delay=0.0, fail_rate=0.0):
+    httpd = ThreadingHTTPServer((host, port), StubHandler)
+    httpd.daemon_threads = True
+    httpd.state = StubState(records, token_ttl, delay, fail_rate)
+    process = multiprocessing.get_context("fork").Process(target=httpd.serve_forever, daemon=True)
+    process.start()
+    httpd.socket.close()
+    return process, f"http://{host}:{httpd.server_address[1]}"
+
+
+# python api_stub.py [port] [days]: serves generate_records(days) when days
+# is given, the small make_records() set otherwise
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5090
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    httpd.state = StubState(generate_records(int(sys.argv[2])) if len(sys.argv) > 2 else None)
+    print(f"API stub listening on http://127.0.0.1:{port}")
+    httpd.serve_forever()
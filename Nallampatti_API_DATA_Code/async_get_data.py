@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import aiohttp
+import pandas as pd
+
+from get_data import DEFAULT_TOKEN_TTL, TOKEN_EXPIRY_MARGIN, credentials, headers
+
+API_URL = "https://mongodb-api-hmeu.onrender.com"
+
+# Station name -> (API base URL, data endpoint)
+STATIONS = {
+    "nallampatti": (API_URL, "/nallampatti_data"),
+}
+LIMIT_PER_HOST = 8
+REQUEST_TIMEOUT = 30  # seconds, per request
+
+# api_url -> (token, expiry on the monotonic clock)
+_tokens = {}
+
+
+async def _get_token(session, api_url, force=False):
+    token, expiry = _tokens.get(api_url, (None, 0.0))
+    if force or not token or time.monotonic() >= expiry - TOKEN_EXPIRY_MARGIN:
+        async with session.post(api_url + "/get_token", json=credentials, headers=headers) as response:
+            if response.status != 200:
+                print(f"Failed to generate token: {await response.text()}")
+                _tokens.pop(api_url, None)
+                return None
+            body = await response.json()
+        token = body.get("token")
+        _tokens[api_url] = (token, time.monotonic() + float(body.get("expires_in", DEFAULT_TOKEN_TTL)))
+    return token
+
+
+async def _fetch_station(session, api_url, path, token):
+    for attempt in range(2):
+        async with session.get(api_url + path, headers={"Authorization": f"Bearer {token}"}) as response:
+            if response.status == 401 and attempt == 0:
+                token = await _get_token(session, api_url, force=True)
+                if not token:
+                    return None
+                continue
+            if response.status == 200:
+                return await response.json()
+            print(f"Failed to fetch data: {await response.text()}")
+            return None
+
+
+# Fetches every station concurrently over one pooled session (at most
+# limit_per_host connections per host) and merges the records into one frame
+# with a leading 'station' column. Stations that fail are reported and left
+# out, so wall time is close to the slowest single station.
+async def fetch_stations_async(stations=STATIONS, limit_per_host=LIMIT_PER_HOST, timeout=REQUEST_TIMEOUT):
+    connector = aiohttp.TCPConnector(limit_per_host=limit_per_host)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        hosts = sorted({api_url for api_url, _ in stations.values()})
+        tokens = await asyncio.gather(*(_get_token(session, host) for host in hosts), return_exceptions=True)
+        tokens = dict(zip(hosts, tokens))
+
+        names = []
+        requests = []
+        for name, (api_url, path) in stations.items():
+            token = tokens[api_url]
+            if isinstance(token, Exception) or not token:
+                print(f"Failed to fetch {name}: no token for {api_url}")
+                continue
+            names.append(name)
+            requests.append(_fetch_station(session, api_url, path, token))
+        results = await asyncio.gather(*requests, return_exceptions=True)
+
+    frames = []
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"Failed to fetch {name}: {result!r}")
+            continue
+        if not result:
+            continue
+        frame = pd.DataFrame(result)
+        frame.insert(0, 'station', name)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def fetch_stations(stations=STATIONS, **kwargs):
+    return asyncio.run(fetch_stations_async(stations, **kwargs))
+
+
+# Per-station frames from a merged frame, e.g. to run preprocess_data or the
+# filter functions on one station at a time
+def split_stations(df):
+    return {name: group.reset_index(drop=True) for name, group in df.groupby('station', sort=False)}
@@ -0,0 +1,141 @@
+import argparse
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+from dateutil import parser
+
+from rollups import FREQS, bucket_labels, combine_partials, finalize, partial_sums, valid_mask
+from storage import STORE_DIR, SensorStore
+
+
+# Every station's store under root: one SensorStore per subdirectory
+def station_stores(root=STORE_DIR):
+    return {name: SensorStore(os.path.join(root, name)) for name in sorted(os.listdir(root))
+            if not name.startswith(".") and os.path.isdir(os.path.join(root, name))}
+
+
+# (station, first_day, last_day) work items: one per station and calendar
+# month of stored days within the range
+def partitions(stores, from_date=None, to_date=None):
+    start = parser.parse(from_date).date().isoformat() if from_date else None
+    end = parser.parse(to_date).date().isoformat() if to_date else None
+    for station, store in stores.items():
+        months = {}
+        for day in store.partitions():
+            if (start is None or day >= start) and (end is None or day <= end):
+                months.setdefault(day[:7], []).append(day)
+        for days in months.values():
+            yield station, days[0], days[-1]
+
+
+# Runs in a worker: reads one partition from the store (memory-mapped) and
+# returns its partial sums per granularity, which are small next to the rows.
+# Only the hourly sums are taken over the rows; hours nest in days, weeks and
+# months, so the coarser sums are added up from the hourly ones.
+def partition_partials(root, metrics, first_day, last_day, granularities):
+    df = SensorStore(root, metrics).read(first_day, last_day)
+    if df.empty:
+        return {}
+    hourly = partial_sums(df, 'hourly', valid=valid_mask(df))
+    result = {}
+    for g in granularities:
+        if g == 'hourly':
+            result[g] = hourly
+        else:
+            labels = pd.DatetimeIndex(bucket_labels(hourly.index.values, g), name='timestamp')
+            result[g] = hourly.groupby(labels, sort=True).sum()
+    return result
+
+
+# Aggregates the stored history of many stations without loading it whole.
+# Each station/month partition is reduced to partial sums in a process pool;
+# at most max_pending partitions are submitted at a time, so a worker's
+# memory follows the partition size, not the history length. The partials
+# are additive and are combined into the same tables
+# filter_data_hourly/daily/weekly/monthly return for each station over the
+# range (as with the rollups, sums split across partitions can differ from
+# a single resample in the last bit). A station's partials are finalized as
+# soon as its last partition is in, so besides the result tables only the
+# stations in flight are held.
+#
+# stores: {station: SensorStore}. workers=1 runs in this process; otherwise
+# the calling script needs the usual if __name__ == "__main__" guard, since
+# workers are spawned. Returns {station: {granularity: table}}.
+def aggregate_stations(stores, from_date=None, to_date=None, granularities=tuple(FREQS), workers=None,
+                       max_pending=None):
+    unknown = set(granularities) - set(FREQS)
+    if unknown:
+        raise ValueError(f"Unknown granularity: {', '.join(sorted(unknown))}")
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    work = list(partitions(stores, from_date, to_date))
+    remaining = Counter(station for station, _, _ in work)
+    parts = {station: {g: [] for g in granularities} for station in stores}
+    tables = {}
+
+    def finish(station):
+        tables[station] = {g: finalize(combine_partials(parts[station][g]), g) for g in granularities}
+        del parts[station]
+
+    def collect(station, result):
+        for g, partials in result.items():
+            parts[station][g].append(partials)
+        remaining[station] -= 1
+        if remaining[station] == 0:
+            finish(station)
+    if workers == 1:
+        for station, first_day, last_day in work:
+            store = stores[station]
+            collect(station, partition_partials(store.root, store.metrics, first_day, last_day, granularities))
+    else:
+        # Spawned, not forked: workers start without a copy of the caller's
+        # heap (or its threads' locks), so their memory is only what they read
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending = {}
+            for station, first_day, last_day in work:
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(pending.pop(future), future.result())
+                store = stores[station]
+                future = pool.submit(partition_partials, store.root, store.metrics, first_day, last_day,
+                                     granularities)
+                pending[future] = station
+            for future in wait(pending).done:
+                collect(pending[future], future.result())
+
+    # Stations with no stored days in the range
+    for station in list(parts):
+        finish(station)
+    return {station: tables[station] for station in stores}
+
+
+# python batch_aggregate.py [root] --from 2020-01-01 --to 2024-12-31 --out tables/
+# writes <station>_<granularity>.csv for every station store under root
+def main():
+    args = argparse.ArgumentParser()
+    args.add_argument("root", nargs="?", default=STORE_DIR, help="directory of per-station stores")
+    args.add_argument("--from", dest="from_date")
+    args.add_argument("--to", dest="to_date")
+    args.add_argument("--granularity", nargs="+", choices=list(FREQS), default=list(FREQS))
+    args.add_argument("--workers", type=int)
+    args.add_argument("--out", default=".")
+    args = args.parse_args()
+
+    stores = station_stores(args.root)
+    if not stores:
+        print(f"No station stores under {args.root}")
+        return
+    tables = aggregate_stations(stores, args.from_date, args.to_date, args.granularity, args.workers)
+    os.makedirs(args.out, exist_ok=True)
+    for station, by_granularity in tables.items():
+        for granularity, table in by_granularity.items():
+            table.to_csv(os.path.join(args.out, f"{station}_{granularity}.csv"), index=False)
+        print(f"{station}: " + ", ".join(f"{g} {len(t)} rows" for g, t in by_granularity.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,531 @@
+# Benchmarks for the data processing hot paths.
+# Usage: python benchmarks.py [name ...] [--span 1m 1y 10y] [--stations N]
+#                             [--save results.json] [--compare baseline.json]
+# Runs everything when no name is given. Benchmarks that record() their
+# measurements can be saved and compared against an earlier run.
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+warnings.simplefilter("ignore", FutureWarning)
+
+
+def synthetic_frame(n_rows, start="2015-01-01"):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n_rows, freq="10min"),
+        'FlowInd': rng.random(n_rows) * 10,
+        'Depth': rng.random(n_rows) * 80,
+        'TDS': rng.random(n_rows) * 400,
+        'pH': 7 + rng.random(n_rows),
+    })
+
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# Best wall time over repeat runs, then one more run under tracemalloc for the
+# peak Python/numpy allocation (kept separate since tracing slows the code)
+def measure(fn, repeat=3):
+    seconds = best_of(fn, repeat)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+RESULTS = []
+
+
+def record(benchmark, case, seconds, peak_bytes=None, **params):
+    RESULTS.append({'benchmark': benchmark, 'case': case, 'seconds': seconds, 'peak_bytes': peak_bytes,
+                    'params': params})
+    peak = f"{peak_bytes / 2 ** 20:>9.1f} MB" if peak_bytes is not None else ""
+    print(f"{case:>40} {seconds * 1e3:>11.2f} ms {peak}")
+
+
+def save_results(path):
+    with open(path, "w") as f:
+        json.dump({'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                   'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'results': RESULTS}, f, indent=1)
+
+
+# Time and peak memory of this run relative to a saved run, for the cases
+# both have
+def compare_results(path, threshold=1.2):
+    with open(path) as f:
+        baseline = {(r['benchmark'], r['case'], json.dumps(r['params'], sort_keys=True)): r
+                    for r in json.load(f)['results']}
+    print(f"{'case':>40} {'time':>8} {'memory':>8}")
+    for r in RESULTS:
+        base = baseline.get((r['benchmark'], r['case'], json.dumps(r['params'], sort_keys=True)))
+        if base is None:
+            continue
+        ratio = r['seconds'] / base['seconds'] if base['seconds'] else float('nan')
+        memory = (f"{r['peak_bytes'] / base['peak_bytes']:>7.2f}x"
+                  if r['peak_bytes'] and base['peak_bytes'] else f"{'-':>8}")
+        flag = "  <- slower" if ratio > threshold else ""
+        print(f"{r['case']:>40} {ratio:>7.2f}x {memory}{flag}")
+
+
+# Range query cost against history size: boolean .dt.date masks versus the
+# searchsorted slice used by filter_data
+def bench_filter_range():
+    from data_process1 import filter_data
+
+    print(f"{'rows':>10} {'mask (ms)':>12} {'searchsorted (ms)':>18}")
+    for n_rows in [10_000, 100_000, 1_000_000, 5_000_000]:
+        df = synthetic_frame(n_rows)
+        to_day = df['timestamp'].iloc[-1].date()
+        from_day = to_day - pd.Timedelta(days=1)
+        f, t = str(from_day), str(to_day)
+
+        def mask():
+            dates = df['timestamp'].dt.date
+            return df[(dates >= from_day) & (dates <= to_day)]
+
+        print(f"{n_rows:>10} {best_of(mask, 3) * 1e3:>12.2f} {best_of(lambda: filter_data(df, f, t)) * 1e3:>18.3f}")
+
+
+# One aggregate() call versus the four separate filter_data_* calls
+def bench_aggregate():
+    from data_process1 import aggregate, filter_data, filter_data_daily, filter_data_hourly, \
+        filter_data_monthly, filter_data_weekly
+
+    df = synthetic_frame(500_000)
+    f, t = "2016-01-01", "2020-12-31"
+
+    def separate():
+        filter_data_daily(df, f, t)
+        filter_data_weekly(df, f, t)
+        filter_data_monthly(df, f, t)
+        filter_data_hourly(filter_data(df, f, t).copy())
+
+    print(f"separate calls: {best_of(separate, 3) * 1e3:.1f} ms")
+    print(f"aggregate():    {best_of(lambda: aggregate(df, f, t), 3) * 1e3:.1f} ms")
+
+
+# Bytes sent to the browser per interval tick: full figure rebuild versus the
+# extend/trim patch, for each dashboard duration
+def bench_figure_payload():
+    from downsample import downsample
+    from figures import build_figure, extend_figure, figure_state, payload_size
+
+    df = synthetic_frame(2 * 7 * 144)
+    print(f"{'duration':>10} {'full (bytes)':>14} {'patch (bytes)':>14}")
+    for label, hours in [('1 Hour', 1), ('24 Hours', 24), ('3 Days', 72), ('1 Week', 168)]:
+        window = pd.Timedelta(hours=hours)
+        before = df.iloc[:-1]
+        start = before['timestamp'].iloc[-1] - window
+        shown = before[before['timestamp'] >= start]
+        kept = downsample(shown['timestamp'].values, shown['pH'].values, 600)
+        state = figure_state('pH', label, shown['timestamp'].values[kept])
+
+        # One new 10 minute sample arrives
+        start = df['timestamp'].iloc[-1] - window
+        window_df = df[df['timestamp'] >= start]
+        kept = downsample(window_df['timestamp'].values, window_df['pH'].values, 600)
+        full = build_figure(window_df['timestamp'].values[kept], window_df['pH'].values[kept],
+                            f'pH Vs {label}', 'pH ()', [7, 10])
+        patch, _ = extend_figure(state, window_df['timestamp'].values, window_df['pH'].values, start)
+        print(f"{label:>10} {payload_size(full):>14} {payload_size(patch):>14}")
+
+
+STARTUP_SCRIPT = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("dashboard_app", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+response = module.create_app().test_client().get("/dashboard/")
+print(imported - start, time.perf_counter() - imported, response.status_code)
+"""
+
+
+# Cold start of the dashboard in a fresh interpreter: module import time and
+# time to build the app with create_app() and get its first response. Also
+# reports what the map/plotting libraries the app used to import at module
+# level would add.
+def bench_startup():
+    from api_stub import start_stub
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    httpd, url = start_stub()
+    env = dict(os.environ, API_URL=url, PYTHONPATH=os.pathsep.join([here, os.environ.get('PYTHONPATH', '')]))
+    out = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, os.path.join(here, "main1.1.py")],
+                         env=env, capture_output=True, text=True)
+    httpd.shutdown()
+    if out.returncode != 0:
+        raise RuntimeError(f"main1.1.py failed to start:\n{out.stderr.strip()}")
+    imported, first_response, status = out.stdout.split()
+    print(f"import: {float(imported) * 1e3:.0f} ms, first response ({status}): {float(first_response) * 1e3:.0f} ms")
+
+    heavy = "import time; t = time.perf_counter(); import geopandas, folium, matplotlib.pyplot; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", heavy], capture_output=True, text=True)
+    if out.returncode == 0:
+        print(f"geopandas + folium + matplotlib import: {float(out.stdout) * 1e3:.0f} ms")
+    else:
+        print("geopandas/folium/matplotlib not installed")
+
+
+# Peak RSS of the current process in kB. VmHWM starts fresh after exec, unlike
+# ru_maxrss which inherits the parent's peak.
+PEAK_RSS = "int([l for l in open('/proc/self/status') if l.startswith('VmHWM')][0].split()[1])"
+
+FETCH_SCRIPT = """
+import sys, time
+from get_data import fetch_data_from_api, fetch_frame_from_api
+from data_process1 import preprocess_data
+start = time.perf_counter()
+data = fetch_data_from_api(sys.argv[1]) if sys.argv[2] == "json" else fetch_frame_from_api(sys.argv[1])
+df = preprocess_data(data)
+print(time.perf_counter() - start, """ + PEAK_RSS + """, len(df))
+"""
+
+
+# Fetch + preprocess of a large payload from the local stub: response.json()
+# into a list of dicts versus streaming into column buffers. Each path runs
+# in its own interpreter so peak RSS is comparable.
+def bench_streaming_fetch(n_records=500_000):
+    from api_stub import make_records, start_stub
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    httpd, url = start_stub(make_records(n_records))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([here, os.environ.get('PYTHONPATH', '')]))
+    base = subprocess.run([sys.executable, "-c", "import data_process1, get_data; print(" + PEAK_RSS + ")"],
+                          env=env, capture_output=True, text=True)
+    print(f"{n_records} records, interpreter + imports: {int(base.stdout) / 1024:.0f} MB")
+    for mode in ["json", "stream"]:
+        out = subprocess.run([sys.executable, "-c", FETCH_SCRIPT, url, mode], env=env, capture_output=True, text=True)
+        seconds, max_rss_kb, rows = out.stdout.split()
+        print(f"{mode:>7}: {float(seconds):.2f} s, peak RSS {int(max_rss_kb) / 1024:.0f} MB, {rows} rows")
+    httpd.shutdown()
+
+
+# Dashboard read latency while the upstream is healthy, slow and failing:
+# fetching inside the callback (as the dashboard used to) versus reading the
+# poller's last good snapshot with stale-while-revalidate
+def bench_resilience(reads=200):
+    from api_stub import start_stub
+    from get_data import fetch_data_from_api
+    from poller import SnapshotPoller
+    from resilience import CircuitBreaker, resilient
+
+    httpd, url = start_stub()
+    fetch = resilient(fetch_data_from_api, CircuitBreaker(failure_threshold=3, reset_timeout=5),
+                      attempts=3, base_delay=0.1, max_delay=1.0)
+    poller = SnapshotPoller(lambda: fetch(url), interval=1)
+    poller.refresh()
+    phases = [("healthy", 0.0, 0.0), ("slow (2 s)", 2.0, 0.0), ("failing (503)", 0.0, 1.0)]
+
+    print(f"{'upstream':>14} {'inline p99 (ms)':>16} {'snapshot p99 (ms)':>18} {'served':>8}")
+    for name, delay, fail_rate in phases:
+        httpd.state.delay, httpd.state.fail_rate = delay, fail_rate
+        inline = []
+        for _ in range(5):
+            start = time.perf_counter()
+            fetch_data_from_api(url)
+            inline.append(time.perf_counter() - start)
+
+        latencies = []
+        served = 0
+        for _ in range(reads):
+            start = time.perf_counter()
+            snapshot, age, error = poller.get(max_age=1)
+            latencies.append(time.perf_counter() - start)
+            served += snapshot is not None
+            time.sleep(0.01)
+        print(f"{name:>14} {np.percentile(inline, 99) * 1e3:>16.1f} "
+              f"{np.percentile(latencies, 99) * 1e3:>18.3f} {served:>4}/{reads}")
+    httpd.shutdown()
+
+
+# Cost of the metrics hooks per call with instrumentation off and on, next to
+# a bare function call, and their share of a typical filter call
+def bench_instrumentation(calls=200_000):
+    import metrics
+    from data_process1 import filter_data_daily
+
+    def bare():
+        return None
+
+    hooked = metrics.timed('bench')(bare)
+    was_enabled = metrics.enabled()
+    for on in [False, True]:
+        metrics.enable(on)
+        per_call = best_of(lambda: [hooked() for _ in range(calls)], 3) / calls
+        base = best_of(lambda: [bare() for _ in range(calls)], 3) / calls
+        print(f"metrics {'on ' if on else 'off'}: {(per_call - base) * 1e9:6.0f} ns per hooked call")
+
+    df = synthetic_frame(100_000)
+    for on in [False, True]:
+        metrics.enable(on)
+        print(f"filter_data_daily, metrics {'on ' if on else 'off'}: "
+              f"{best_of(lambda: filter_data_daily(df, '2015-01-01', '2015-12-31')) * 1e3:.2f} ms")
+    metrics.enable(was_enabled)
+    metrics.reset()
+
+
+# Aggregate API request cost on a year of 10-minute data: first request
+# (aggregate + serialize), cached body, and a conditional GET answered 304
+def bench_aggregate_api():
+    from flask import Flask
+    from aggregate_api import AggregateService, create_blueprint
+
+    df = synthetic_frame(365 * 144, start="2024-01-01")
+    server = Flask(__name__)
+    service = AggregateService(lambda: df)
+    server.register_blueprint(create_blueprint(service))
+    client = server.test_client()
+
+    for granularity in ['hourly', 'daily', 'weekly', 'monthly']:
+        url = f"/api/aggregates/{granularity}?from=2024-01-01&to=2024-12-31"
+
+        def cold():
+            service.cache.invalidate()
+            return client.get(url)
+
+        etag = cold().headers['ETag']
+        print(f"{granularity:>8}: cold {best_of(cold) * 1e3:7.2f} ms, "
+              f"cached {best_of(lambda: client.get(url)) * 1e3:6.2f} ms, "
+              f"304 {best_of(lambda: client.get(url, headers={'If-None-Match': etag})) * 1e3:6.2f} ms")
+
+
+# Full raw and hourly exports in each format over one and ten years; the peak
+# allocation should follow the chunk size, not the span. Resuming the last
+# 10% shows the cost of a range request once the piece sizes are known.
+def bench_export():
+    from export_api import FORMATS, ExportService
+
+    df = synthetic_frame(3650 * 144, start="2015-01-01")
+    service = ExportService(lambda: df)
+    for years, to_date in [(1, '2015-12-31'), (10, '2024-12-31')]:
+        for fmt in FORMATS:
+            for kind in ['raw', 'hourly']:
+                export = service.export(kind, fmt, '2015-01-01', to_date)
+                full = lambda: sum(len(piece) for piece in service.stream(export))
+                record('export', f"{kind} {fmt} {years}y", *measure(full, 1), years=years)
+                length = full()
+                tail = lambda: sum(len(piece) for piece in service.stream_range(export, length * 9 // 10, length))
+                record('export', f"{kind} {fmt} {years}y last 10%", *measure(tail, 1), years=years)
+
+
+# Batch aggregation of several stations' stored history against loading each
+# history and running the filter functions in memory. The peak is the calling
+# process's (tracemalloc); workers are separate processes.
+def bench_batch_aggregate(stations=3):
+    import data_process1 as dp
+    from batch_aggregate import aggregate_stations, station_stores
+    from storage import SensorStore
+
+    for years in [1, 8]:
+        root = tempfile.mkdtemp()
+        try:
+            for i in range(stations):
+                SensorStore(os.path.join(root, f"station_{i}")).write(
+                    synthetic_frame(years * 365 * 144, start=f"{2024 - years}-01-01"))
+            stores = station_stores(root)
+
+            def in_memory():
+                for store in stores.values():
+                    df = store.read()
+                    f, t = str(df['timestamp'].iloc[0].date()), str(df['timestamp'].iloc[-1].date())
+                    dp.filter_data_hourly(df.copy()), dp.filter_data_daily(df, f, t)
+                    dp.filter_data_weekly(df, f, t), dp.filter_data_monthly(df, f, t)
+
+            record('batch_aggregate', f"in memory {years}y", *measure(in_memory, 1), years=years, stations=stations)
+            for workers in sorted({1, os.cpu_count() or 1, 4}):
+                record('batch_aggregate', f"{workers} worker(s) {years}y",
+                       *measure(lambda: aggregate_stations(stores, workers=workers), 1),
+                       years=years, stations=stations, workers=workers)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+# Timestamp decoding on generated API strings (with malformed ones):
+# pd.to_datetime with the format, the vectorized decoder from scratch, and a
+# refresh that repeats the previous history plus one new day
+def bench_timestamps():
+    from api_stub import DATE_FORMAT, generate_records
+    from timestamps import TimestampDecoder
+
+    print(f"{'rows':>8} {'to_datetime (ms)':>17} {'decoder (ms)':>13} {'refresh (ms)':>13}")
+    for days in [30, 365, 3650]:
+        values = pd.Series([r['timestamp'] for r in generate_records(days + 1)], dtype=object)
+        history, refreshed = values[:-144], values
+
+        def refresh():
+            decoder = TimestampDecoder()
+            decoder.decode(history)
+            start = time.perf_counter()
+            decoder.decode(refreshed)
+            return time.perf_counter() - start
+
+        pandas = best_of(lambda: pd.to_datetime(refreshed, format=DATE_FORMAT, errors='coerce'), 3)
+        cold = best_of(lambda: TimestampDecoder().decode(refreshed), 3)
+        warm = min(refresh() for _ in range(3))
+        print(f"{len(refreshed):>8} {pandas * 1e3:>17.1f} {cold * 1e3:>13.1f} {warm * 1e3:>13.1f}")
+
+
+SPANS = {'1m': 30, '1y': 365, '10y': 3650}
+DASHBOARD_OUTPUTS = "..error-message.children...ph.children...tds.children...depth.children" \
+                    "...flowind.children...graph.figure...figure-state.data.."
+
+
+# The Flask server create_app() in main1.1.py builds against api_url, with its
+# first snapshot loaded
+def load_dashboard(api_url):
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.environ.update(API_URL=api_url, POLL_INTERVAL="86400", SNAPSHOT_DIR=tempfile.mkdtemp())
+    spec = importlib.util.spec_from_file_location("dashboard_app", os.path.join(here, "main1.1.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    server = module.create_app()
+    server.extensions['dashboard'].poller.refresh()
+    return server
+
+
+def dashboard_request(client, trigger, column, duration, fig_state=None, n_intervals=1):
+    ids = ['error-message', 'ph', 'tds', 'depth', 'flowind', 'graph', 'figure-state']
+    props = ['children'] * 5 + ['figure', 'data']
+    body = {
+        'output': DASHBOARD_OUTPUTS,
+        'outputs': [{'id': i, 'property': p} for i, p in zip(ids, props)],
+        'inputs': [{'id': 'interval-component', 'property': 'n_intervals', 'value': n_intervals},
+                   {'id': 'dist_column', 'property': 'value', 'value': column},
+                   {'id': 'time_duration', 'property': 'value', 'value': duration}],
+        'state': [{'id': 'graph-width', 'property': 'data', 'value': 800},
+                  {'id': 'figure-state', 'property': 'data', 'value': fig_state}],
+        'changedPropIds': [trigger],
+    }
+    response = client.post("/dashboard/_dash-update-component", json=body)
+    assert response.status_code == 200, response.status_code
+    result = response.get_json()
+    error = result['response']['error-message']['children']
+    assert not (error or "").startswith("An error occurred"), error
+    return result
+
+
+# The data path end to end on generated data (see api_stub.generate_records)
+# served by the stub from another process: fetch, preprocessing, every
+# filter_data_* variant in data_process1 and data_processingdemo, and the
+# dashboard callback through Flask. One run per span; with stations > 1 the
+# concurrent multi-station fetch is measured too.
+def bench_pipeline(spans=('1m', '1y'), stations=1):
+    import data_process1 as dp
+    import data_processingdemo as demo
+    from api_stub import generate_stations, start_stub_process
+    from get_data import fetch_data_from_api, fetch_frame_from_api
+
+    for span in spans:
+        days = SPANS[span]
+        names = ['nallampatti'] + [f'station_{i}' for i in range(1, stations)]
+        process, url = start_stub_process(generate_stations(names, days))
+        params = {'span': span, 'stations': stations}
+        print(f"-- span {span} ({days} days), {stations} station(s)")
+        try:
+            run = lambda case, fn, repeat=3: record('pipeline', case, *measure(fn, repeat), **params)
+            run('fetch_data_from_api', lambda: fetch_data_from_api(url), 1)
+            run('fetch_frame_from_api', lambda: fetch_frame_from_api(url), 1)
+            if stations > 1:
+                from async_get_data import fetch_stations
+                run('fetch_stations', lambda: fetch_stations({n: (url, f"/{n}_data") for n in names}), 1)
+
+            data = fetch_data_from_api(url)
+            run('data_process1.preprocess_data', lambda: dp.preprocess_data(data))
+            df = dp.preprocess_data(data)
+            f, t = str(df['timestamp'].iloc[0].date()), str(df['timestamp'].iloc[-1].date())
+            run('data_process1.filter_data', lambda: dp.filter_data(df, f, t))
+            run('data_process1.filter_data_daily', lambda: dp.filter_data_daily(df, f, t))
+            run('data_process1.filter_data_weekly', lambda: dp.filter_data_weekly(df, f, t))
+            run('data_process1.filter_data_monthly', lambda: dp.filter_data_monthly(df, f, t))
+            run('data_process1.filter_data_hourly', lambda: dp.filter_data_hourly(df.copy()))
+            run('data_process1.aggregate', lambda: dp.aggregate(df, f, t))
+
+            demo.API_URL = url
+            demo.invalidate_cache()
+            run('demo.preprocess_data', demo.preprocess_data, 1)
+            demo.get_cached_data()
+            run('demo.filter_data', lambda: demo.filter_data(f, t))
+            run('demo.filter_data_daily', lambda: demo.filter_data_daily(f, t))
+            run('demo.filter_data_weekly', lambda: demo.filter_data_weekly(f, t))
+            run('demo.filter_data_monthly', lambda: demo.filter_data_monthly(f, t))
+            run('demo.filter_data_hourly', demo.filter_data_hourly)
+            demo.invalidate_cache()
+
+            dashboard = load_dashboard(url)
+            client = dashboard.test_client()
+            first = dashboard_request(client, 'dist_column.value', 'pH', '1 Week')
+            state = first['response']['figure-state']['data']
+            run('update_dashboard (1 Week, rebuild)',
+                lambda: dashboard_request(client, 'dist_column.value', 'pH', '1 Week'))
+            run('update_dashboard (1 Week, tick)',
+                lambda: dashboard_request(client, 'interval-component.n_intervals', 'pH', '1 Week', state))
+            dashboard.extensions['dashboard'].poller.stop()
+        finally:
+            process.terminate()
+
+
+BENCHMARKS = {
+    'filter_range': bench_filter_range,
+    'aggregate': bench_aggregate,
+    'figure_payload': bench_figure_payload,
+    'startup': bench_startup,
+    'streaming_fetch': bench_streaming_fetch,
+    'resilience': bench_resilience,
+    'pipeline': bench_pipeline,
+    'instrumentation': bench_instrumentation,
+    'aggregate_api': bench_aggregate_api,
+    'timestamps': bench_timestamps,
+    'export': bench_export,
+    'batch_aggregate': bench_batch_aggregate,
+}
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("names", nargs="*", metavar="name", help=", ".join(BENCHMARKS))
+    args.add_argument("--span", nargs="+", choices=list(SPANS), default=['1m', '1y'])
+    args.add_argument("--stations", type=int, default=1)
+    args.add_argument("--save", metavar="PATH", help="write recorded results as JSON")
+    args.add_argument("--compare", metavar="PATH", help="compare recorded results with a saved run")
+    parsed = args.parse_args()
+    unknown = set(parsed.names) - set(BENCHMARKS)
+    if unknown:
+        args.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    args = parsed
+
+    for name in args.names or list(BENCHMARKS):
+        print(f"== {name}")
+        if name == 'pipeline':
+            bench_pipeline(args.span, args.stations)
+        else:
+            BENCHMARKS[name]()
+    if args.save:
+        save_results(args.save)
+    if args.compare:
+        print(f"== compared with {args.compare}")
+        compare_results(args.compare)
@@ -1,14 +1,23 @@
 import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from dateutil import parser
 from get_data import fetch_data_from_api
+from rollups import FREQS, MEAN_RULES, METRICS
+from metrics import stage, timed
+from timestamps import TimestampDecoder
 
 API_URL = "https://mongodb-api-hmeu.onrender.com"
+# Reuses the previous refresh's decoded timestamps for unchanged rows
+_timestamps = TimestampDecoder()
 
 # Shared preprocessing function for data
+# data may be the list of records from fetch_data_from_api or the frame from
+# fetch_frame_from_api
+@timed("preprocess", rows=True)
 def preprocess_data(data, date_format="%d-%b-%Y %H:%M:%S"):
-    if not data:
+    if data is None or len(data) == 0:
         print("No data received")
         return pd.DataFrame()
 
@@ -17,24 +26,101 @@ def preprocess_data(data, date_format="%d-%b-%Y %H:%M:%S"):
         print("DataFrame is empty after conversion")
         return df
 
-    df['timestamp'] = pd.to_datetime(df['timestamp'], format=date_format, errors='coerce')
+    with stage("to_datetime"):
+        df['timestamp'] = _timestamps.decode(df['timestamp'], date_format)
     df.dropna(subset=['timestamp'], inplace=True)  # Drop rows with invalid timestamps
     df.fillna(0, inplace=True)
+    # Keep rows in time order so range queries can binary-search the timestamps
+    df.sort_values('timestamp', kind='stable', inplace=True, ignore_index=True)
     return df
 
+# Compact variant of preprocess_data: keeps only the timestamp and the given
+# metric columns, stores metrics as float32 and, optionally, the timestamp as
+# int32 epoch seconds (valid until 2038). Missing readings are recorded in a
+# uint8 'valid' bitmask (bit i set when columns[i] was present) instead of
+# being indistinguishable zeros; their value slots hold 0 so sums match the
+# zero-filled frame. Roughly a third of the legacy frame's memory.
+@timed("preprocess_compact", rows=True)
+def preprocess_compact(data, date_format="%d-%b-%Y %H:%M:%S", columns=METRICS, epoch_seconds=False):
+    if len(columns) > 8:
+        raise ValueError("The validity bitmask holds at most 8 columns")
+    if data is None or len(data) == 0:
+        print("No data received")
+        return pd.DataFrame()
+
+    raw = pd.DataFrame(data)
+    if raw.empty:
+        print("DataFrame is empty after conversion")
+        return raw
+
+    with stage("to_datetime"):
+        timestamps = _timestamps.decode(raw['timestamp'], date_format)
+    keep = ~np.isnat(timestamps)
+    order = np.argsort(timestamps[keep], kind='stable')
+    timestamps = timestamps[keep][order]
+
+    df = pd.DataFrame({'timestamp': timestamps.astype('datetime64[s]').astype(np.int32) if epoch_seconds else timestamps})
+    valid = np.zeros(len(df), dtype=np.uint8)
+    for bit, col in enumerate(columns):
+        if col in raw:
+            values = pd.to_numeric(raw[col], errors='coerce').values[keep][order].astype(np.float32)
+        else:
+            values = np.full(len(df), np.nan, dtype=np.float32)
+        present = ~np.isnan(values)
+        valid |= present.astype(np.uint8) << bit
+        df[col] = np.where(present, values, np.float32(0))
+    df['valid'] = valid
+    return df
+
+# Converts a compact frame back to the layout preprocess_data produces
+# (datetime64 timestamps, float64 metrics, zero-filled)
+def expand_compact(df, columns=METRICS):
+    timestamps = df['timestamp'].values
+    if np.issubdtype(timestamps.dtype, np.integer):
+        timestamps = timestamps.astype(np.int64).astype('datetime64[s]')
+    expanded = pd.DataFrame({'timestamp': timestamps.astype('datetime64[ns]')})
+    for col in columns:
+        expanded[col] = df[col].values.astype(np.float64)
+    return expanded
+
+# Boolean mask of rows where the given metric was actually reported
+def present_mask(df, column, columns=METRICS):
+    return (df['valid'].values >> columns.index(column)) & 1 == 1
+
 # Fetch and preprocess data once
 def fetch_and_preprocess_data():
     data = fetch_data_from_api(API_URL)
     return preprocess_data(data)
 
-# Generic filter function
-def filter_data(df, from_date, to_date):
+# The filter functions below answer from a rollups.RollupEngine when one is
+# passed, instead of re-filtering and resampling the raw frame
+
+# Rows with start <= column < end from a frame sorted on column. Uses binary
+# search on the timestamps and returns a positional slice (a view), so the
+# cost does not grow with history size. Either bound may be None.
+def slice_by_time(df, start=None, end=None, column='timestamp'):
+    values = df[column].values
+    lo = values.searchsorted(np.datetime64(start, 'ns'), side='left') if start is not None else 0
+    hi = values.searchsorted(np.datetime64(end, 'ns'), side='left') if end is not None else len(values)
+    return df.iloc[lo:hi]
+
+# Rows of a frame sorted on column covering whole days from_date..to_date
+def slice_by_date(df, from_date, to_date, column='timestamp'):
     from_date = parser.parse(from_date).date()
     to_date = parser.parse(to_date).date()
-    return df[(df['timestamp'].dt.date >= from_date) & (df['timestamp'].dt.date <= to_date)]
+    return slice_by_time(df, datetime.combine(from_date, datetime.min.time()),
+                         datetime.combine(to_date + timedelta(days=1), datetime.min.time()), column)
+
+# Generic filter function
+@timed("filter", rows=True)
+def filter_data(df, from_date, to_date):
+    return slice_by_date(df, from_date, to_date)
 
 # Filter for daily data
-def filter_data_daily(df, from_date, to_date):
+@timed("filter_daily", rows=True)
+def filter_data_daily(df, from_date, to_date, rollups=None):
+    if rollups is not None:
+        return rollups.query('daily', from_date, to_date)
     filtered_df = filter_data(df, from_date, to_date)
     filtered_df.set_index('timestamp', inplace=True)
 
@@ -52,7 +138,10 @@ def filter_data_daily(df, from_date, to_date):
     return water_data.merge(tds_ph_data, on='timestamp')
 
 # Filter for weekly data
-def filter_data_weekly(df, from_date, to_date):
+@timed("filter_weekly", rows=True)
+def filter_data_weekly(df, from_date, to_date, rollups=None):
+    if rollups is not None:
+        return rollups.query('weekly', from_date, to_date)
     filtered_df = filter_data(df, from_date, to_date)
     filtered_df.set_index('timestamp', inplace=True)
 
@@ -64,7 +153,10 @@ def filter_data_weekly(df, from_date, to_date):
     }).reset_index()
 
 # Filter for monthly data
-def filter_data_monthly(df, from_date, to_date):
+@timed("filter_monthly", rows=True)
+def filter_data_monthly(df, from_date, to_date, rollups=None):
+    if rollups is not None:
+        return rollups.query('monthly', from_date, to_date)
     filtered_df = filter_data(df, from_date, to_date)
     filtered_df = filtered_df[(filtered_df['TDS'] != 0) & (filtered_df['pH'] != 0)]
     filtered_df.set_index('timestamp', inplace=True)
@@ -77,7 +169,10 @@ def filter_data_monthly(df, from_date, to_date):
     }).reset_index()
 
 # Filter for hourly data
-def filter_data_hourly(df):
+@timed("filter_hourly", rows=True)
+def filter_data_hourly(df, rollups=None):
+    if rollups is not None:
+        return rollups.query('hourly')
     df = df[(df['TDS'] != 0) & (df['pH'] != 0)]
     df.set_index('timestamp', inplace=True)
 
@@ -88,6 +183,35 @@ def filter_data_hourly(df):
         'pH': 'mean'
     }).reset_index()
 
+# Computes several granularities in one pass: the date range is sliced once,
+# the TDS/pH validity mask is computed once, and every table is binned from the
+# same two time-indexed frames (all rows and valid rows). Because the rows are
+# already sorted, resample bins them by searching bucket edges rather than
+# hashing each row. Returns a dict of tables identical to
+# filter_data_hourly/daily/weekly/monthly over the same range.
+@timed("aggregate")
+def aggregate(df, from_date, to_date, granularities=('hourly', 'daily', 'weekly', 'monthly')):
+    filtered_df = filter_data(df, from_date, to_date)
+    index = pd.DatetimeIndex(filtered_df['timestamp'].values, name='timestamp')
+    all_rows = pd.DataFrame({m: filtered_df[m].values for m in METRICS}, index=index)
+    valid = ((filtered_df['TDS'] != 0) & (filtered_df['pH'] != 0)).values
+    valid_rows = all_rows[valid]
+
+    tables = {}
+    for granularity in granularities:
+        freq = FREQS[granularity]
+        rule = MEAN_RULES[granularity]
+        if rule == 'all':
+            table = all_rows.resample(freq).mean().reset_index()
+        elif rule == 'valid':
+            table = valid_rows.resample(freq).mean().reset_index()
+        else:
+            water_data = all_rows[['FlowInd', 'Depth']].resample(freq).mean().reset_index()
+            tds_ph_data = valid_rows[['TDS', 'pH']].resample(freq).mean().reset_index()
+            table = water_data.merge(tds_ph_data, on='timestamp')
+        tables[granularity] = table
+    return tables
+
 # Main function to execute filtering operations
 def main():
     # Fetch and preprocess data once
@@ -1,22 +1,30 @@
 # import  dependencies 
 
 import pandas as pd
-from dateutil import parser
 from get_data import fetch_data_from_api
+from data_process1 import slice_by_date
+from metrics import stage, timed
+from timestamps import TimestampDecoder
 import time
+import threading
 
 
 # start Processing
 
 API_URL= "https://mongodb-api-hmeu.onrender.com"
+CACHE_TTL = 600  # seconds, matches the 10 minute sensor interval
+_timestamps = TimestampDecoder()
 
 
+@timed("demo_preprocess", rows=True)
 def preprocess_data(date_format="%d-%b-%Y %H:%M:%S"):
     data = fetch_data_from_api(API_URL)
     df = pd.DataFrame(data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], format=date_format, errors='coerce')
+    with stage("to_datetime"):
+        df['timestamp'] = _timestamps.decode(df['timestamp'], date_format)
     df.dropna(subset=['timestamp'], inplace=True)
     df.fillna(0, inplace=True)
+    df.sort_values('timestamp', kind='stable', inplace=True, ignore_index=True)
     #df['FlowInd'] = df['FlowInd'].round().astype(int)
     df['TDS'] = df['TDS'].round().astype(int)
     #df['pH'] = df['pH'].round().astype(int)
@@ -24,18 +32,50 @@ def preprocess_data(date_format="%d-%b-%Y %H:%M:%S"):
     return df
 
 
+# Process-wide cache of the preprocessed frame. Only one caller refreshes it
+# at a time; callers that were waiting on that refresh reuse its result
+# instead of fetching again.
+_cache = {'df': None, 'loaded_at': 0.0}
+_cache_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def _cache_fresh(ttl):
+    return _cache['df'] is not None and time.monotonic() - _cache['loaded_at'] < ttl
+
+
+def get_cached_data(ttl=CACHE_TTL):
+    with _cache_lock:
+        if _cache_fresh(ttl):
+            return _cache['df']
+
+    with _refresh_lock:
+        # Another caller may have refreshed while we waited for the lock
+        with _cache_lock:
+            if _cache_fresh(ttl):
+                return _cache['df']
+        df = preprocess_data()
+        with _cache_lock:
+            _cache['df'] = df
+            _cache['loaded_at'] = time.monotonic()
+        return df
+
+
+def invalidate_cache():
+    with _cache_lock:
+        _cache['df'] = None
+        _cache['loaded_at'] = 0.0
+
+
+@timed("demo_filter", rows=True)
 def filter_data(from_date, to_date):
-    df = preprocess_data()
-    from_date = parser.parse(from_date)
-    to_date = parser.parse(to_date)
-    return df[(df['timestamp'].dt.date >= from_date.date()) & (df['timestamp'].dt.date <= to_date.date())]
+    return slice_by_date(get_cached_data(), from_date, to_date)
 
 
+@timed("demo_filter_daily", rows=True)
 def filter_data_daily(from_date, to_date):
-    df = preprocess_data()
-    from_date = parser.parse(from_date)
-    to_date = parser.parse(to_date)
-    df = df[(df['timestamp'].dt.date >= from_date.date()) & (df['timestamp'].dt.date <= to_date.date())]
+    df = get_cached_data()
+    df = slice_by_date(df, from_date, to_date)
     df.set_index('timestamp', inplace=True)
     water_data = df.resample('D').agg({'FlowInd': 'mean', 'Depth': 'mean'}).reset_index()
     df = df[(df['TDS'] != 0)]
@@ -44,28 +84,27 @@ def filter_data_daily(from_date, to_date):
     return water_data.merge(tds_ph_data, how='inner', on='timestamp')
 
 
+@timed("demo_filter_weekly", rows=True)
 def filter_data_weekly(from_date, to_date):
-    df = preprocess_data()
-    from_date = parser.parse(from_date)
-    to_date = parser.parse(to_date)
-    df = df[(df['timestamp'].dt.date >= from_date.date()) & (df['timestamp'].dt.date <= to_date.date())]
+    df = get_cached_data()
+    df = slice_by_date(df, from_date, to_date)
     df.set_index('timestamp', inplace=True)
     return df.resample('W-Mon').agg({'FlowInd': 'sum', 'Depth': 'sum', 'TDS': 'mean', 'pH': 'mean'}).reset_index()
 
 
+@timed("demo_filter_monthly", rows=True)
 def filter_data_monthly(from_date, to_date):
-    df = preprocess_data()
-    from_date = parser.parse(from_date)
-    to_date = parser.parse(to_date)
+    df = get_cached_data()
+    df = slice_by_date(df, from_date, to_date)
     df = df[(df['TDS'] != 0)]
     df = df[(df['pH'] != 0)]
-    df = df[(df['timestamp'].dt.date >= from_date.date()) & (df['timestamp'].dt.date <= to_date.date())]
     df.set_index('timestamp', inplace=True)
     return df.resample('ME').agg({'FlowInd': 'sum', 'Depth': 'sum', 'TDS': 'mean', 'pH': 'mean'}).reset_index()
 
 
+@timed("demo_filter_hourly", rows=True)
 def filter_data_hourly():
-    df = preprocess_data()
+    df = get_cached_data()
     df = df[(df['TDS'] != 0)]
     df = df[(df['pH'] != 0)]
     df.set_index('timestamp', inplace=True)
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+# Largest-Triangle-Three-Buckets: keeps the first and last points and, for
+# every bucket in between, the point forming the largest triangle with the
+# previously kept point and the average of the next bucket. Returns the
+# indices of the kept points.
+def lttb(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x[0]
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+# Keeps the minimum and maximum of every bucket (in time order), so spikes
+# and dips survive however far the series is reduced. Returns indices.
+def minmax(y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    kept = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        lo = start + int(np.argmin(y[start:end]))
+        hi = start + int(np.argmax(y[start:end]))
+        kept.extend(sorted({lo, hi}))
+    return np.asarray(kept, dtype=np.int64)
+
+
+METHODS = ('lttb', 'minmax', 'none')
+
+
+# Downsamples a time-indexed series to about n_out points with the given
+# method and returns the kept positions. Timestamps may be datetime64.
+def downsample(x, y, n_out, method='lttb'):
+    y = np.asarray(y, dtype=np.float64)
+    if method == 'none' or len(y) <= n_out:
+        return np.arange(len(y))
+    if method == 'minmax':
+        return minmax(y, n_out)
+    if method == 'lttb':
+        x = np.asarray(x)
+        if np.issubdtype(x.dtype, np.datetime64):
+            x = x.astype("datetime64[ns]").astype(np.int64)
+            x = x - x[0]
+        return lttb(x, y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,318 @@
+import gzip
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.datastructures import ContentRange
+
+from aggregate_api import changed_from, parse_date_range
+from data_process1 import slice_by_time
+from metrics import observe_bytes, observe_rows
+from rollups import FREQS, METRICS, combine_partials, finalize, partial_sums
+
+CHUNK_ROWS = 50_000
+# gzip's own default; level 9 is about 4x slower for ~1% smaller files
+GZIP_LEVEL = 6
+# Piece sizes remembered per export, so range requests can seek
+MAX_INDEXES = 64
+# ETags remembered per (kind, format, from, to) for the current snapshot
+MAX_ETAGS = 256
+# format -> (mimetype, file extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+# Collects what a ParquetWriter writes so it can be handed out piece by piece
+class _Sink(io.RawIOBase):
+    def __init__(self):
+        self._pieces = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._pieces.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b"".join(self._pieces)
+        self._pieces = []
+        return data
+
+
+# One export of a time-sorted frame, encoded as a sequence of byte pieces: the
+# CSV header, then one piece per chunk_rows rows (plus the footer for
+# Parquet). Only one chunk is encoded at a time, so memory does not depend on
+# the number of rows. The bytes are the same on every run, which is what lets
+# a download be resumed by byte offset.
+#
+# CSV pieces can be produced starting from any piece. csv.gz compresses every
+# piece as its own gzip member (concatenated members are a valid gzip file),
+# so it can as well. Parquet pieces depend on the writer's state and always
+# start from the first one.
+#
+# load returns the frame and is only called once the rows are needed, so an
+# export built with a known etag answers conditional requests without
+# reading (or aggregating) anything.
+class Export:
+    def __init__(self, load, columns, fmt, chunk_rows=CHUNK_ROWS, rename=None, key=(), etag=None):
+        if fmt == 'parquet':
+            import pyarrow  # noqa: F401 - fail before any bytes are sent
+        self._load = load
+        self._frame = None
+        self.columns = list(columns)
+        self.format = fmt
+        self.chunk_rows = chunk_rows
+        self.rename = rename or {}
+        self.seekable = fmt != 'parquet'
+        self.etag = etag if etag is not None else self._fingerprint(key)
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = self._load()
+        return self._frame
+
+    def _fingerprint(self, key):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((key, self.format, self.chunk_rows, self.columns)).encode())
+        for col in self.columns:
+            values = self.frame[col].values
+            for lo in range(0, len(values), self.chunk_rows):
+                digest.update(np.ascontiguousarray(values[lo:lo + self.chunk_rows]).view(np.uint8))
+        return digest.hexdigest()
+
+    def _chunk(self, lo):
+        return self.frame.iloc[lo:lo + self.chunk_rows][self.columns].rename(columns=self.rename)
+
+    def pieces(self, first=0):
+        if self.format == 'parquet':
+            return self._parquet_pieces()
+        pieces = self._csv_pieces(first)
+        if self.format == 'csv.gz':
+            return (gzip.compress(piece, compresslevel=GZIP_LEVEL, mtime=0) for piece in pieces)
+        return pieces
+
+    def _csv_pieces(self, first):
+        if first == 0:
+            yield self._chunk(0).iloc[:0].to_csv(index=False).encode()
+        for i, lo in enumerate(range(0, len(self.frame), self.chunk_rows), start=1):
+            if i >= first:
+                chunk = self._chunk(lo)
+                # ISO 8601 timestamps, formatted by NumPy rather than per row
+                chunk['timestamp'] = np.datetime_as_string(chunk['timestamp'].values, unit='s')
+                yield chunk.to_csv(index=False, header=False).encode()
+
+    def _parquet_pieces(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = _Sink()
+        schema = pa.Schema.from_pandas(self._chunk(0).iloc[:0], preserve_index=False)
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for lo in range(0, len(self.frame), self.chunk_rows):
+                writer.write_table(pa.Table.from_pandas(self._chunk(lo), schema=schema, preserve_index=False))
+                yield sink.take()
+        finally:
+            writer.close()
+        yield sink.take()
+
+
+# Raw samples or aggregates over the latest snapshot, as Export objects.
+# get_frame returns the current sorted frame (or None while loading).
+# Aggregates are built from per-chunk partial sums (as the rollups are), so
+# raw rows are only ever held one chunk at a time.
+#
+# Hashing an export reads all of its rows, so ETags are remembered per
+# request for the current frame. A new frame object is compared with the
+# previous one and only the ETags of ranges reaching its first changed row
+# are dropped, as in aggregate_api.
+class ExportService:
+    def __init__(self, get_frame, timestamp_column='timestamp', chunk_rows=CHUNK_ROWS, metrics=METRICS):
+        self.get_frame = get_frame
+        self.timestamp_column = timestamp_column
+        self.chunk_rows = chunk_rows
+        self.metrics = list(metrics)
+        self._sizes = OrderedDict()
+        self._etags = OrderedDict()
+        self._source = None
+        self._lock = threading.Lock()
+
+    def _sync(self, source):
+        if source is self._source:
+            return
+        if self._source is None:
+            self._etags.clear()
+        else:
+            rename = {self.timestamp_column: 'timestamp'}
+            since = changed_from(self._source.rename(columns=rename, copy=False),
+                                 source.rename(columns=rename, copy=False), self.metrics)
+            if since is not None:
+                for key in [key for key, (_, end) in self._etags.items() if end > since]:
+                    del self._etags[key]
+        self._source = source
+
+    def export(self, kind, fmt, from_date, to_date):
+        df = self.get_frame()
+        if df is None:
+            return None
+        start = datetime.fromisoformat(from_date)
+        end = datetime.fromisoformat(to_date) + timedelta(days=1)
+        key = (kind, fmt, from_date, to_date)
+        with self._lock:
+            self._sync(df)
+            cached = self._etags.get(key)
+            if cached is not None:
+                self._etags.move_to_end(key)
+        rows = slice_by_time(df, start, end, column=self.timestamp_column)
+        if kind == 'raw':
+            columns = [self.timestamp_column] + [m for m in self.metrics if m in rows]
+            export = Export(lambda: rows, columns, fmt, self.chunk_rows, {self.timestamp_column: 'timestamp'},
+                            key, cached and cached[0])
+        else:
+            export = Export(lambda: self._aggregate(rows, kind), ['timestamp'] + self.metrics, fmt,
+                            self.chunk_rows, key=key, etag=cached and cached[0])
+        if cached is None:
+            with self._lock:
+                # Not remembered if a newer frame arrived meanwhile
+                if self._source is df:
+                    self._etags[key] = (export.etag, pd.Timestamp(end))
+                    while len(self._etags) > MAX_ETAGS:
+                        self._etags.popitem(last=False)
+        return export
+
+    def _aggregate(self, rows, granularity):
+        parts = []
+        for lo in range(0, len(rows), self.chunk_rows):
+            chunk = rows.iloc[lo:lo + self.chunk_rows]
+            chunk = chunk[[self.timestamp_column] + self.metrics].rename(columns={self.timestamp_column: 'timestamp'})
+            parts.append(partial_sums(chunk, granularity))
+        return finalize(combine_partials(parts), granularity)
+
+    # Size of every piece of an export, encoding (and discarding) it once if
+    # it was never streamed in full
+    def sizes(self, export):
+        with self._lock:
+            sizes = self._sizes.get(export.etag)
+            if sizes is not None:
+                self._sizes.move_to_end(export.etag)
+                return sizes
+        sizes = [len(piece) for piece in export.pieces()]
+        self._remember(export.etag, sizes)
+        return sizes
+
+    def known_length(self, export):
+        with self._lock:
+            sizes = self._sizes.get(export.etag)
+        return sum(sizes) if sizes is not None else None
+
+    def _remember(self, etag, sizes):
+        with self._lock:
+            self._sizes[etag] = sizes
+            self._sizes.move_to_end(etag)
+            while len(self._sizes) > MAX_INDEXES:
+                self._sizes.popitem(last=False)
+
+    # The whole export; piece sizes are remembered once it was sent in full
+    def stream(self, export):
+        sizes = []
+        for piece in export.pieces():
+            sizes.append(len(piece))
+            yield piece
+        self._remember(export.etag, sizes)
+        observe_rows('export', len(export.frame))
+        observe_bytes('export', sum(sizes))
+
+    # Bytes [start, stop) of the export. Seekable formats skip straight to
+    # the piece holding start; Parquet is encoded from the beginning and the
+    # bytes before start are dropped.
+    def stream_range(self, export, start, stop):
+        sizes = self.sizes(export)
+        first = offset = 0
+        if export.seekable:
+            while first < len(sizes) and offset + sizes[first] <= start:
+                offset += sizes[first]
+                first += 1
+        for piece in export.pieces(first):
+            end = offset + len(piece)
+            if end > start:
+                yield piece[max(start - offset, 0):stop - offset]
+            offset = end
+            if offset >= stop:
+                return
+
+
+def create_blueprint(service):
+    api = Blueprint('export_api', __name__, url_prefix='/api')
+
+    # GET /api/export/<raw|hourly|daily|weekly|monthly>?from=YYYY-MM-DD&to=YYYY-MM-DD&format=<csv|csv.gz|parquet>
+    # Supports If-None-Match, and Range/If-Range to resume a download
+    @api.route('/export/<kind>')
+    def export(kind):
+        if kind != 'raw' and kind not in FREQS:
+            return jsonify(error=f"Unknown export '{kind}'"), 404
+        fmt = request.args.get('format', 'csv')
+        if fmt not in FORMATS:
+            return jsonify(error=f"Format must be one of {', '.join(FORMATS)}"), 400
+        try:
+            from_date, to_date = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+
+        try:
+            result = service.export(kind, fmt, from_date, to_date)
+        except ImportError:
+            return jsonify(error="Parquet export needs pyarrow installed"), 501
+        if result is None:
+            return jsonify(error="Data is still loading"), 503
+
+        mimetype, extension = FORMATS[fmt]
+        headers = {
+            'Content-Disposition': f'attachment; filename="nallampatti-{kind}-{from_date}-{to_date}.{extension}"',
+            'Accept-Ranges': 'bytes',
+        }
+        if request.if_none_match.contains(result.etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(result.etag)
+            return response
+
+        # A Range for an older version of the export (If-Range mismatch) or
+        # with several ranges gets the whole export instead
+        byte_range = request.range
+        if_range = request.if_range
+        if (byte_range is not None and len(byte_range.ranges) == 1
+                and (if_range.etag == result.etag or (if_range.etag is None and if_range.date is None))):
+            length = sum(service.sizes(result))
+            span = byte_range.range_for_length(length)
+            if span is None:
+                response = Response(status=416, headers=headers)
+                response.content_range = ContentRange('bytes', None, None, length)
+                return response
+            start, stop = span
+            response = Response(service.stream_range(result, start, stop), status=206, mimetype=mimetype,
+                                headers=headers, direct_passthrough=True)
+            response.content_range = ContentRange('bytes', start, stop, length)
+            response.content_length = stop - start
+        else:
+            response = Response(service.stream(result), mimetype=mimetype, headers=headers, direct_passthrough=True)
+            length = service.known_length(result)
+            if length is not None:
+                response.content_length = length
+        response.set_etag(result.etag)
+        return response
+
+    return api
@@ -0,0 +1,92 @@
+import json
+from bisect import bisect_left
+
+import numpy as np
+import plotly.graph_objs as go
+from dash import Patch, no_update
+from plotly.utils import PlotlyJSONEncoder
+
+# A long idle tab can fall far behind; past this many trimmed points a full
+# rebuild is smaller than the patch
+MAX_PATCH_TRIM = 100
+# Appended samples are raw, so a patched figure of a downsampled window grows
+# past its target; beyond this factor a rebuild downsamples it again
+MAX_PATCH_GROWTH = 1.25
+
+
+def build_figure(x, y, title, yaxis_title, y_range):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y,
+        mode='lines+markers',
+        line=dict(color='green')
+    ))
+
+    y_min, y_max = y_range
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Time (hrs)',
+        yaxis_title=yaxis_title,
+        yaxis=dict(range=[y_min, y_max]),
+        height=600,
+        margin=dict(l=50, r=50, t=50, b=50),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=14)
+    )
+    return fig
+
+
+def _epoch_ms(x):
+    return np.asarray(x).astype("datetime64[ms]").astype(np.int64).tolist()
+
+
+# What the client currently shows, kept in a dcc.Store so the next tick can
+# work out which points to add and which have left the window
+def figure_state(column, duration, x):
+    return {'column': column, 'duration': duration, 'x': _epoch_ms(x)}
+
+
+# Patches that append the samples newer than the last plotted point and drop
+# the points older than start_time. Returns (figure_patch, state_patch),
+# (no_update, no_update) when nothing changed, or None when a full rebuild
+# is cheaper or, with target_points (the downsampling target of full
+# builds), when the patched figure would hold too many points.
+def extend_figure(state, x, y, start_time, target_points=None):
+    shown = state['x']
+    last = shown[-1] if shown else None
+    x_ms = np.asarray(_epoch_ms(x), dtype=np.int64)
+    first_new = int(np.searchsorted(x_ms, last, side='right')) if last is not None else 0
+    n_trim = bisect_left(shown, _epoch_ms([np.datetime64(start_time, 'ns')])[0])
+
+    if n_trim > MAX_PATCH_TRIM or n_trim >= len(shown):
+        return None
+    if target_points is not None and len(shown) - n_trim + len(x_ms) - first_new > target_points * MAX_PATCH_GROWTH:
+        return None
+    if first_new >= len(x_ms) and n_trim == 0:
+        return no_update, no_update
+
+    fig_patch = Patch()
+    state_patch = Patch()
+    new_x = np.datetime_as_string(np.asarray(x[first_new:]).astype("datetime64[s]")).tolist()
+    new_y = np.asarray(y[first_new:], dtype=np.float64).tolist()
+    if new_x:
+        fig_patch['data'][0]['x'].extend(new_x)
+        fig_patch['data'][0]['y'].extend(new_y)
+        state_patch['x'].extend(x_ms[first_new:].tolist())
+    for _ in range(n_trim):
+        del fig_patch['data'][0]['x'][0]
+        del fig_patch['data'][0]['y'][0]
+        del state_patch['x'][0]
+    return fig_patch, state_patch
+
+
+# Serialized size of a figure or patch as sent to the browser
+def payload_size(obj):
+    if isinstance(obj, Patch):
+        obj = obj.to_plotly_json()
+    elif isinstance(obj, go.Figure):
+        obj = obj.to_plotly_json()
+    return len(json.dumps(obj, cls=PlotlyJSONEncoder).encode())
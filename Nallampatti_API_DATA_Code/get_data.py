@@ -1,5 +1,9 @@
 import requests
 import time
+import threading
+from requests.adapters import HTTPAdapter
+from json_stream import decode_stream
+from metrics import observe_bytes, observe_rows, stage, timed
 
 credentials = {
     "username": "Kamlesh123",
@@ -10,33 +14,131 @@ headers = {
         "Content-Type": "application/json"
     }
 
+# Token lifetime used when the API does not report an expiry
+DEFAULT_TOKEN_TTL = 15 * 60
+# Refresh the token this many seconds before it actually expires
+TOKEN_EXPIRY_MARGIN = 30
+POOL_SIZE = 10
+# (connect, read) timeouts in seconds for every request
+REQUEST_TIMEOUT = (5, 30)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+# Keeps one pooled keep-alive session per API and reuses the bearer token
+# until it expires (or the API answers 401)
+class ApiClient:
+    def __init__(self, api_url, pool_size=POOL_SIZE, token_ttl=DEFAULT_TOKEN_TTL, timeout=REQUEST_TIMEOUT):
+        self.api_url = api_url
+        self.token_ttl = token_ttl
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._token = None
+        self._token_expiry = 0.0
+        self._lock = threading.Lock()
+
+    @timed("token")
+    def _request_token(self):
+        response = self.session.post(self.api_url + "/get_token", json=credentials, headers=headers,
+                                     timeout=self.timeout)
+
+        if response.status_code == 200:
+            body = response.json()
+            expires_in = body.get("expires_in", self.token_ttl)
+            return body.get("token"), time.monotonic() + float(expires_in)
+        else:
+            print(f"Failed to generate token: {response.content}")
+            return None, 0.0
+
+    def get_token(self, force=False):
+        with self._lock:
+            if force or not self._token or time.monotonic() >= self._token_expiry - TOKEN_EXPIRY_MARGIN:
+                self._token, self._token_expiry = self._request_token()
+            return self._token
+
+    def invalidate_token(self):
+        with self._lock:
+            self._token = None
+            self._token_expiry = 0.0
+
+    def get(self, path, params=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        token = self.get_token()
+        if not token:
+            return None
+
+        response = self.session.get(self.api_url + path, headers={"Authorization": f"Bearer {token}"},
+                                    params=params, **kwargs)
+        if response.status_code == 401:
+            # Token was revoked or expired early, refresh once and retry
+            token = self.get_token(force=True)
+            if not token:
+                return None
+            response = self.session.get(self.api_url + path, headers={"Authorization": f"Bearer {token}"},
+                                        params=params, **kwargs)
+        return response
+
+    def fetch_data(self, since=None, since_param="since"):
+        params = {since_param: since} if since else None
+        with stage("download"):
+            response = self.get("/nallampatti_data", params=params)
+
+        if response is None:
+            return None
+        if response.status_code == 200:
+            observe_bytes("download", len(response.content))
+            with stage("json_decode"):
+                data = response.json()
+            observe_rows("json_decode", len(data))
+            return data
+        else:
+            print(f"Failed to fetch data: {response.content}")
+            return None
+
+    # Streams the response body and decodes it record by record into typed
+    # column arrays; returns a DataFrame (timestamps already decoded to
+    # datetime64) instead of a list of dicts
+    def fetch_frame(self, since=None, since_param="since", chunk_size=STREAM_CHUNK_SIZE):
+        params = {since_param: since} if since else None
+        response = self.get("/nallampatti_data", params=params, stream=True)
+
+        if response is None:
+            return None
+        with response:
+            if response.status_code == 200:
+                # Download and decoding overlap when streaming, so they are
+                # timed as one stage
+                with stage("stream_decode"):
+                    df = decode_stream(response.iter_content(chunk_size))
+                observe_rows("stream_decode", len(df))
+                return df
+            else:
+                print(f"Failed to fetch data: {response.content}")
+                return None
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_url):
+    with _clients_lock:
+        client = _clients.get(api_url)
+        if client is None:
+            client = _clients[api_url] = ApiClient(api_url)
+        return client
+
+
 def generate_token(api_url):
-    response = requests.post(api_url + "/get_token", json=credentials, headers=headers)
-    
-    if response.status_code == 200:
-        token = response.json().get("token")
-        # expiry_time = response.json().get("expiry_time")  # Assuming this field exists in the API response
-        return token
-    else:
-        print(f"Failed to generate token: {response.content}")
-        return None
-
-def fetch_data_from_api(api_url):
-    token = generate_token(api_url)  # Adjust the endpoint accordingly
-    
-    if not token:
-        return None
-    
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }
-    
-    response = requests.get(api_url + "/nallampatti_data", headers=headers)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Failed to fetch data: {response.content}")
-        return None         
+    return get_client(api_url).get_token()
 
+def fetch_data_from_api(api_url, since=None):
+    return get_client(api_url).fetch_data(since=since)
 
+def fetch_frame_from_api(api_url, since=None):
+    return get_client(api_url).fetch_frame(since=since)
@@ -0,0 +1,152 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+from data_process1 import API_URL, filter_data, preprocess_compact, preprocess_data
+from get_data import fetch_data_from_api
+from storage import VALID_COLUMN
+from timestamps import parse_timestamps
+
+DATE_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+
+# Returns the records newer than the high-water mark. The API returns rows in
+# time order, so only the tail is parsed; the scan stops at the first valid
+# timestamp that is already held. A frame (from fetch_frame_from_api) is
+# filtered with one comparison instead.
+def records_after(data, high_water_mark, date_format=DATE_FORMAT):
+    if isinstance(data, pd.DataFrame):
+        if high_water_mark is None:
+            return data
+        timestamps = parse_timestamps(data['timestamp'], date_format)
+        return data[timestamps > np.datetime64(high_water_mark)].reset_index(drop=True)
+    if high_water_mark is None:
+        return list(data)
+
+    start = len(data)
+    for i in range(len(data) - 1, -1, -1):
+        try:
+            ts = datetime.strptime(data[i].get("timestamp", ""), date_format)
+        except (TypeError, ValueError):
+            continue
+        if ts <= high_water_mark:
+            break
+        start = i
+    return data[start:]
+
+
+# Keeps an already preprocessed frame and appends only samples newer than the
+# newest timestamp held, so each refresh parses only what arrived since the
+# last one. With a store, history is warmed from disk on start and every new
+# batch is persisted. With a rollup engine, every new batch also updates the
+# aggregate tables.
+#
+# compact=True holds samples in the preprocess_compact layout (float32 metrics
+# and a validity bitmask) to fit more history per byte. memory_budget caps the
+# in-memory frame in bytes: older rows are dropped from RAM, and history()
+# reads them back from the store, so a budget requires a store.
+class Ingestor:
+    def __init__(self, api_url=API_URL, date_format=DATE_FORMAT, fetch=fetch_data_from_api, store=None,
+                 rollups=None, compact=False, memory_budget=None):
+        if memory_budget is not None and store is None:
+            raise ValueError("memory_budget needs a store to spill older history to")
+        self.api_url = api_url
+        self.date_format = date_format
+        self.fetch = fetch
+        self.store = store
+        self.rollups = rollups
+        self.compact = compact
+        self.preprocess = preprocess_compact if compact else preprocess_data
+        self.memory_budget = memory_budget
+        self.df = pd.DataFrame()
+        self.high_water_mark = None
+        self._lock = threading.Lock()
+        if store is not None:
+            self.warm()
+
+    def warm(self, from_date=None):
+        if self.memory_budget is not None and from_date is None:
+            row_bytes = 8 + (4 * len(self.store.metrics) + 1 if self.compact else 8 * len(self.store.metrics))
+            df = self.store.read_latest(self.memory_budget // row_bytes)
+        else:
+            df = self.store.read(from_date)
+
+        if self.rollups is not None:
+            # The rollups cover all of history: the frame just read when it
+            # holds all of it, otherwise the store read a year at a time
+            if self.memory_budget is None and from_date is None:
+                self.rollups.update(df)
+            else:
+                self.rollups.update_many(self.store.read(first, last) for first, last in self._years())
+
+        if self.compact and not df.empty:
+            df = df.astype({col: 'float32' for col in self.store.metrics})
+            # Partitions written from non-compact frames have no bitmask;
+            # their readings count as present
+            if VALID_COLUMN not in df:
+                df[VALID_COLUMN] = np.uint8(0xFF)
+        if not df.empty:
+            self.df = df
+            self.high_water_mark = df['timestamp'].iloc[-1].to_pydatetime()
+            self._enforce_budget()
+
+    # (first_day, last_day) of every calendar year with stored days
+    def _years(self):
+        years = {}
+        for day in self.store.partitions():
+            years.setdefault(day[:4], []).append(day)
+        return [(days[0], days[-1]) for days in years.values()]
+
+    def _enforce_budget(self):
+        if self.memory_budget is None or self.df.empty:
+            return
+        usage = self.df.memory_usage(index=True, deep=True).sum()
+        if usage <= self.memory_budget:
+            return
+        keep = int(len(self.df) * self.memory_budget / usage)
+        # Rows past the budget are already in the store
+        self.df = self.df.iloc[len(self.df) - keep:].reset_index(drop=True).copy()
+
+    # Rows between from_date and to_date (whole days), from memory when the
+    # range is still held there and from the store otherwise
+    def history(self, from_date, to_date):
+        start = parser.parse(from_date)
+        if self.store is not None and (self.df.empty or start < self.df['timestamp'].iloc[0]):
+            return self.store.read(from_date, to_date)
+        return filter_data(self.df, from_date, to_date)
+
+    def append(self, new_df):
+        if new_df.empty:
+            return new_df
+        if self.high_water_mark is not None:
+            new_df = new_df[new_df['timestamp'] > self.high_water_mark]
+            if new_df.empty:
+                return new_df
+        new_df = new_df.sort_values('timestamp', kind='stable')
+        self.df = new_df.reset_index(drop=True) if self.df.empty else \
+            pd.concat([self.df, new_df], ignore_index=True)
+        if self.compact:
+            self.df[VALID_COLUMN] = self.df[VALID_COLUMN].values.astype(np.uint8, copy=False)
+        self.high_water_mark = self.df['timestamp'].iloc[-1].to_pydatetime()
+        if self.store is not None:
+            self.store.write(new_df)
+        if self.rollups is not None:
+            self.rollups.update(new_df)
+        self._enforce_budget()
+        return new_df
+
+    def refresh(self):
+        with self._lock:
+            since = self.high_water_mark.strftime(self.date_format) if self.high_water_mark else None
+            # fetch may return a list of records or a frame
+            data = self.fetch(self.api_url, since=since)
+            if data is None or len(data) == 0:
+                return pd.DataFrame()
+
+            new_records = records_after(data, self.high_water_mark, self.date_format)
+            if len(new_records) == 0:
+                return pd.DataFrame()
+            return self.append(self.preprocess(new_records, self.date_format))
@@ -0,0 +1,109 @@
+import codecs
+import json
+
+import numpy as np
+import pandas as pd
+
+from timestamps import DATE_FORMAT, TEXT_DTYPE, parse_timestamps
+
+METRICS = ['FlowInd', 'Depth', 'TDS', 'pH']
+# Fixed-width ASCII column for the API's "%d-%b-%Y %H:%M:%S" timestamps, one
+# byte wider so longer (malformed) strings stay invalid when cut
+TIMESTAMP_DTYPE = TEXT_DTYPE
+
+
+# Typed, preallocated column arrays that double in size when full. Missing or
+# non-numeric metric values are stored as NaN. Timestamps that are not ASCII
+# strings, or that hold NUL characters (which fixed-width arrays drop), are
+# stored blank and decode as NaT, as they would in pd.to_datetime.
+class ColumnBuffers:
+    def __init__(self, metrics=METRICS, capacity=4096):
+        self.metrics = list(metrics)
+        self.size = 0
+        self.timestamp = np.empty(capacity, dtype=TIMESTAMP_DTYPE)
+        self.values = {m: np.empty(capacity, dtype=np.float64) for m in self.metrics}
+
+    def _grow(self):
+        capacity = len(self.timestamp) * 2
+        self.timestamp = np.resize(self.timestamp, capacity)
+        for m in self.metrics:
+            self.values[m] = np.resize(self.values[m], capacity)
+
+    # Appends a batch of records, converting each column in one go
+    def extend(self, records):
+        n = len(records)
+        while self.size + n > len(self.timestamp):
+            self._grow()
+        rows = slice(self.size, self.size + n)
+        self.timestamp[rows] = [ts if isinstance(ts, str) and ts.isascii() and "\0" not in ts else ""
+                                for ts in (r.get('timestamp') for r in records)]
+        for m in self.metrics:
+            column = [r.get(m) for r in records]
+            try:
+                # None becomes NaN here; numeric strings are parsed
+                self.values[m][rows] = np.array(column, dtype=np.float64)
+            except (TypeError, ValueError):
+                self.values[m][rows] = pd.to_numeric(pd.Series(column, dtype=object), errors='coerce').values
+        self.size += n
+
+    # Frame over the filled part of the buffers, with the timestamps decoded
+    # straight from the bytes buffer to datetime64 (NaT where invalid). Each
+    # column keeps its own array (no consolidation copy).
+    def to_frame(self, date_format=DATE_FORMAT):
+        columns = {'timestamp': parse_timestamps(self.timestamp[:self.size], date_format)}
+        columns.update({m: self.values[m][:self.size] for m in self.metrics})
+        return pd.DataFrame(columns, copy=False)
+
+
+# Yields the objects of a top-level JSON array from an iterable of byte
+# chunks, decoding each object as soon as it is complete so only one record
+# is held as Python objects at a time.
+def iter_json_array(chunks):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+
+    for chunk in chunks:
+        buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Object continues in the next chunk
+                break
+            pos = end
+            yield obj
+
+    buffer = buffer[pos:] + text_decoder.decode(b"", final=True)
+    if buffer.strip() not in ("", "]"):
+        raise ValueError("Truncated JSON array")
+
+
+# Decodes a streamed JSON array of records into a DataFrame, holding at most
+# batch_size records as Python objects at a time
+def decode_stream(chunks, metrics=METRICS, capacity=4096, batch_size=4096):
+    buffers = ColumnBuffers(metrics, capacity)
+    batch = []
+    for record in iter_json_array(chunks):
+        batch.append(record)
+        if len(batch) == batch_size:
+            buffers.extend(batch)
+            batch = []
+    if batch:
+        buffers.extend(batch)
+    return buffers.to_frame()
@@ -3,25 +3,33 @@
 # The rest of your code remains the same, starting from:
 # Import statements...
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
-from collections import defaultdict
-import requests
-from flask import Flask, request, render_template, redirect, url_for
+import time
+from datetime import timedelta
+from flask import Flask, Response, current_app
 import dash
-from dash import dcc, html, dash_table
+from dash import dcc, html, ctx
 from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
-import geopandas as gpd
-import folium
-from folium.plugins import MarkerCluster
-from branca.colormap import LinearColormap
-from functools import lru_cache
-from data_process import process_data
 from get_data import fetch_data_from_api
+from data_process1 import preprocess_data, slice_by_time
+from poller import SnapshotPoller
+from shared_snapshot import SharedSnapshot
+from online_stats import OnlineStats
+from resilience import CircuitBreaker, resilient
+from downsample import downsample
+from figures import build_figure, extend_figure, figure_state, payload_size
+from aggregate_api import AggregateService, create_blueprint
+from export_api import ExportService, create_blueprint as create_export_blueprint
+import metrics
+from metrics import stage, timed
 # Configuration
-API_URL = "https://mongodb-api-hmeu.onrender.com"
+API_URL = os.environ.get('API_URL', "https://mongodb-api-hmeu.onrender.com")
+POLL_INTERVAL = int(os.environ.get('POLL_INTERVAL', 60))  # seconds
+# A snapshot older than this is still served, but flagged and refreshed in
+# the background
+STALE_AFTER = int(os.environ.get('STALE_AFTER', 2 * POLL_INTERVAL))  # seconds
+# How often each worker looks for a newer shared snapshot
+ATTACH_INTERVAL = int(os.environ.get('ATTACH_INTERVAL', 5))  # seconds
 COLUMNS = ['TDS', 'pH', 'Depth', 'FlowInd', 'Timestamp']
 Y_RANGES = {
     "pH": [7, 10],
@@ -44,14 +52,105 @@ UNITS = {
     "Depth": "m",
     "FlowInd": "kL per 10 min"
 }
+# Downsampling used for each parameter's trace: 'lttb' keeps the visual shape,
+# 'minmax' keeps every bucket's extremes (spikes), 'none' sends raw samples
+DOWNSAMPLING = {
+    "pH": "lttb",
+    "TDS": "minmax",
+    "Depth": "lttb",
+    "FlowInd": "minmax"
+}
+DEFAULT_GRAPH_WIDTH = 600  # px, used until the browser reports the real width
+# (low, high) readings that raise an alert, either may be None; IS 10500
+# acceptable limits for drinking water
+ALERT_THRESHOLDS = {
+    "pH": (6.5, 8.5),
+    "TDS": (None, 500)
+}
+ALERT_COLORS = {
+    "high": "#e74c3c",
+    "low": "#e67e22",
+    "anomaly": "#8e44ad",
+    "normal": "#27ae60"
+}
+ALERTS_SHOWN = 10
+
+# Everything one app serves from: the upstream fetch, the shared snapshot and
+# the poller attached to it, the rolling statistics and the API services over
+# the same snapshot. Built by create_app(); nothing runs until the poller is
+# started on the app's first request.
+class DashboardServices:
+    def __init__(self, api_url=API_URL, poll_interval=POLL_INTERVAL):
+        self.api_url = api_url
+        self.poll_interval = poll_interval
+        # Upstream calls are retried with jittered backoff; after repeated
+        # failures the breaker stops calling the API for a while instead of
+        # piling up requests
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        self.fetch_upstream = resilient(fetch_data_from_api, self.breaker, attempts=3, base_delay=1.0)
+        # Under gunicorn only one process (the owner of the shared snapshot)
+        # fetches; it publishes each snapshot to shared memory and every
+        # worker, the owner included, serves a read-only memory-mapped view of
+        # the latest one
+        self.shared = SharedSnapshot.for_source(api_url)
+        self._last_fetch = 0.0
+        # Rolling statistics and alerts, updated with only the new rows of
+        # each snapshot
+        self.stats = OnlineStats(thresholds=ALERT_THRESHOLDS, timestamp_column='Timestamp')
+        self.poller = SnapshotPoller(self.load_shared, interval=min(ATTACH_INTERVAL, poll_interval),
+                                     updated_at=lambda df: self.shared.published_at())
+        # JSON aggregates over the same snapshot, cached until new data
+        # reaches a range
+        self.aggregates = AggregateService(self.poller.snapshot, timestamp_column='Timestamp')
+        # CSV/Parquet downloads of raw samples or aggregates, streamed in chunks
+        self.exports = ExportService(self.poller.snapshot, timestamp_column='Timestamp')
+
+    # Fetch and process the data once per refresh for the whole process; the
+    # dashboard callbacks only read the latest snapshot. A failed fetch
+    # raises, so the poller keeps serving the last good snapshot.
+    @timed('snapshot_load', rows=True)
+    def load_snapshot(self):
+        data = self.fetch_upstream(self.api_url)
+        # The shared preprocessing drops unparseable timestamps (which would
+        # sort last and become the "latest" sample) and sorts the rows
+        with stage('process_data'):
+            df = preprocess_data(data)
+        return df.rename(columns={'timestamp': 'Timestamp'})
 
-# Initialize Flask and Dash apps
-server = Flask(__name__)
-server.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
-app = dash.Dash(__name__, server=server, url_base_pathname='/dashboard/')
+    def load_shared(self):
+        if self.shared.acquire_owner():
+            now = time.time()
+            if now - max(self.shared.published_at() or 0.0, self._last_fetch) >= self.poll_interval:
+                self._last_fetch = now
+                self.shared.publish(self.load_snapshot())
+        # None until the owner's first publish, shown as "Loading"
+        df = self.shared.current()
+        self.stats.feed(df)
+        return df
+
+
+# The services of the app handling the current request
+def current_services():
+    return current_app.extensions['dashboard']
 
 
 # Add these functions before the app.layout definition:
+def stale_notice(age, error):
+    if error is None and age <= STALE_AFTER:
+        return None
+    notice = f"Showing data from {format_age(age)} ago"
+    if error is not None:
+        notice += f"; the latest update failed ({error})"
+    return notice
+
+
+def format_age(seconds):
+    if seconds < 120:
+        return f"{int(seconds)} s"
+    if seconds < 7200:
+        return f"{int(seconds // 60)} min"
+    return f"{seconds / 3600:.1f} h"
+
 
 def create_header():
     return html.Div([
@@ -71,7 +170,7 @@ def create_footer():
         ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '0 20px', 'textAlign': 'center'})
     ], style={'width': '100%', 'backgroundColor': '#f9f9f9', 'padding': '20px 0', 'marginTop': '20px', 'boxShadow': '0 -2px 5px rgba(0,0,0,0.1)'})
 # Dash layout
-app.layout = html.Div([
+layout = html.Div([
     create_header(),
     html.Div([
         html.H3("Water Quality", style={'textAlign': 'center','color': '#7ec1fd'}),
@@ -93,6 +192,7 @@ app.layout = html.Div([
                      'border': '1px solid #7ec1fd',
                      'borderRadius': '10px'
                  }),
+        html.Div(id='alerts', style={'margin': '0 0 20px 0', 'fontSize': '14px'}),
         html.Div([
             html.Div([
                 html.Div([
@@ -120,69 +220,140 @@ app.layout = html.Div([
         ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'})
     ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '0 20px'}),
     create_footer(),
+    dcc.Store(id='graph-width'),
+    dcc.Store(id='figure-state'),
     dcc.Interval(id='interval-component', interval=60000, n_intervals=0)
 ], style={'fontFamily': 'Arial, sans-serif', 'backgroundColor': '#f9f9f9'})
 
-@app.callback(
-    [Output('error-message', 'children')] +
-    [Output(f'{param.lower()}', 'children') for param in ['pH', 'TDS', 'Depth', 'FlowInd']] +
-    [Output('graph', 'figure')],
-    [Input('interval-component', 'n_intervals'),
-     Input('dist_column', 'value'),
-     Input('time_duration', 'value')]
-)
-def update_dashboard(n, selected_column, selected_duration):
+# Callbacks are registered on each app by register_callbacks() and find its
+# services through current_services()
+
+@timed('update_dashboard')
+def update_dashboard(n, selected_column, selected_duration, graph_width, fig_state):
     try:
-        data = fetch_data_from_api(API_URL)
-        df = process_data(data)
-        
+        services = current_services()
+        df, age, error = services.poller.get(STALE_AFTER)
+
+        if df is None:
+            if error is not None:
+                return [f"An error occurred: {str(error)}"] + ["Error"] * 4 + [go.Figure(), None]
+            return ["Loading data, please wait."] + ["N/A"] * 4 + [go.Figure(), None]
         if df.empty:
-            return ["No data available. Please check the API connection."] + ["N/A"] * 4 + [go.Figure()]
+            return ["No data available. Please check the API connection."] + ["N/A"] * 4 + [go.Figure(), None]
 
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        end_time = df['Timestamp'].max()
+        end_time = df['Timestamp'].iloc[-1]
         start_time = end_time - TIME_DURATIONS[selected_duration]
-        df_filtered = df[(df['Timestamp'] >= start_time) & (df['Timestamp'] <= end_time)]
-
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=df_filtered['Timestamp'],
-            y=df_filtered[selected_column],
-            mode='lines+markers',
-            line=dict(color='green')
-        ))
-        
-        y_min, y_max = Y_RANGES.get(selected_column, [None, None])
-        
-        fig.update_layout(
-            title=f'{selected_column} Vs {selected_duration}',
-            xaxis_title='Time (hrs)', 
-            yaxis_title=f'{selected_column} ({UNITS[selected_column]})', 
-            yaxis=dict(range=[y_min, y_max]),
-            height=600, 
-            margin=dict(l=50, r=50, t=50, b=50),
-            paper_bgcolor='rgba(0,0,0,0)', 
-            plot_bgcolor='rgba(0,0,0,0)', 
-            font=dict(size=14)
-        )
-
-        latest = df.iloc[-1] if not df.empty else pd.Series()
+        df_filtered = slice_by_time(df, start_time, column='Timestamp')
+
+        # About one point per horizontal pixel is all the graph can show.
+        # Interval ticks only send the new points (and drop the expired ones)
+        # while the parameter and duration stay the same, until the figure
+        # outgrows that target
+        target_points = int(graph_width or DEFAULT_GRAPH_WIDTH)
+        update = None
+        if (ctx.triggered_id == 'interval-component' and fig_state
+                and fig_state['column'] == selected_column and fig_state['duration'] == selected_duration):
+            with stage('figure'):
+                update = extend_figure(fig_state, df_filtered['Timestamp'].values,
+                                       df_filtered[selected_column].values, start_time, target_points)
+
+        if update is None:
+            with stage('downsample'):
+                kept = downsample(df_filtered['Timestamp'].values, df_filtered[selected_column].values,
+                                  target_points, DOWNSAMPLING.get(selected_column, 'lttb'))
+            df_plot = df_filtered.iloc[kept]
+            with stage('figure'):
+                fig = build_figure(df_plot['Timestamp'], df_plot[selected_column],
+                                   f'{selected_column} Vs {selected_duration}',
+                                   f'{selected_column} ({UNITS[selected_column]})',
+                                   Y_RANGES.get(selected_column, [None, None]))
+            update = fig, figure_state(selected_column, selected_duration, df_plot['Timestamp'].values)
+        if metrics.enabled():
+            metrics.observe_rows('update_dashboard', len(df_filtered))
+            metrics.observe_bytes('figure', payload_size(update[0]))
+
+        # Latest valid reading, with its mean and spread over the last hour
         value_boxes = []
         for param in ['pH', 'TDS', 'Depth', 'FlowInd']:
-            value = latest.get(param, 'N/A')
-            if value != 'N/A':
-                value = f"{value:.2f}"
+            summary = services.stats.summary(param)
+            value = 'N/A' if summary['latest'] is None else f"{summary['latest']:.2f}"
+            hour = summary['windows']['1h']
+            spread = f"1h {hour['mean']:.2f} ± {hour['std']:.2f}" if hour['count'] else "1h no data"
+            color = ALERT_COLORS[summary['state']] if summary['state'] != 'ok' else 'black'
             value_boxes.append(html.Div([
                 html.Div(param, style={'fontSize': '18px', 'marginBottom': '5px'}),
-                html.Div(f"{value} {UNITS[param]}", style={'fontSize': '18px'})
+                html.Div(f"{value} {UNITS[param]}", style={'fontSize': '18px', 'color': color}),
+                html.Div(spread, style={'fontSize': '12px', 'fontWeight': 'normal', 'color': '#666'})
             ]))
 
-        return [None] + value_boxes + [fig]
+        return [stale_notice(age, error)] + value_boxes + list(update)
     
     except Exception as e:
-        return [f"An error occurred: {str(e)}"] + ["Error"] * 4 + [go.Figure()]
+        return [f"An error occurred: {str(e)}"] + ["Error"] * 4 + [go.Figure(), None]
+
+def update_alerts(n):
+    events = current_services().stats.events(ALERTS_SHOWN)
+    if not events:
+        return None
+    return html.Ul([
+        html.Li(f"{event['time']:%d-%b %H:%M}  {event['message']}", style={'color': ALERT_COLORS[event['kind']]})
+        for event in events
+    ], style={'listStyle': 'none', 'padding': '0', 'margin': '0'})
+
+
+def register_callbacks(app):
+    # Report the rendered graph width so the server can size the downsampling
+    app.clientside_callback(
+        """
+        function(n) {
+            var graph = document.getElementById('graph');
+            return graph ? graph.clientWidth : window.dash_clientside.no_update;
+        }
+        """,
+        Output('graph-width', 'data'),
+        Input('interval-component', 'n_intervals')
+    )
+    app.callback(
+        [Output('error-message', 'children')] +
+        [Output(f'{param.lower()}', 'children') for param in ['pH', 'TDS', 'Depth', 'FlowInd']] +
+        [Output('graph', 'figure'), Output('figure-state', 'data')],
+        [Input('interval-component', 'n_intervals'),
+         Input('dist_column', 'value'),
+         Input('time_duration', 'value')],
+        [State('graph-width', 'data'),
+         State('figure-state', 'data')]
+    )(update_dashboard)
+    app.callback(
+        Output('alerts', 'children'),
+        Input('interval-component', 'n_intervals')
+    )(update_alerts)
+
+# Application factory: builds the Flask server with the dashboard mounted on
+# it, and its services (kept in server.extensions['dashboard']). Importing
+# this module builds nothing; serve create_app(), e.g. with gunicorn's
+# "module:create_app()". Only what the dashboard needs is imported at module
+# level; optional subsystems (maps, static plots) should import their
+# libraries inside the page or callback that uses them so worker boot does
+# not pay for them.
+def create_app(services=None):
+    services = services or DashboardServices()
+    server = Flask(__name__)
+    server.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
+    server.extensions['dashboard'] = services
+    app = dash.Dash(__name__, server=server, url_base_pathname='/dashboard/')
+    app.layout = layout
+    register_callbacks(app)
+    # Prometheus scrape target; histograms stay empty unless NP_METRICS=1
+    server.add_url_rule('/metrics', 'metrics', lambda: Response(metrics.render(), mimetype='text/plain; version=0.0.4'))
+    server.register_blueprint(create_blueprint(services.aggregates))
+    server.register_blueprint(create_export_blueprint(services.exports))
+    # The poller thread starts with the first request of each process, so a
+    # forked worker (gunicorn --preload) runs its own
+    server.before_request(services.poller.ensure_started)
+    return server
+
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5080))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
-    server.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -2,25 +2,17 @@
 
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import timedelta
 import requests
-from flask import Flask, request, render_template, redirect, url_for
+from flask import Flask
 import dash
-from dash import dcc, html, dash_table
+from dash import dcc, html
 from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
-import geopandas as gpd
-import folium
-from folium.plugins import MarkerCluster
-from branca.colormap import LinearColormap
-from functools import lru_cache
-from data_process import process_data
 from get_data import fetch_data_from_api
 
 # Configuration
-API_URL = "https://mongodb-api-hmeu.onrender.com"
+API_URL = os.environ.get('API_URL', "https://mongodb-api-hmeu.onrender.com")
 COLUMNS = ['TDS', 'pH', 'Depth', 'FlowInd', 'Timestamp']
 Y_RANGES = {
     "pH": [7, 10],
@@ -44,12 +36,6 @@ UNITS = {
     "FlowInd": "kL per 10 min"
 }
 
-# Initialize Flask and Dash apps
-server = Flask(__name__)
-server.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
-app = dash.Dash(__name__, server=server, url_base_pathname='/dashboard/')
-
-
 def create_header():
     return html.Div([
         html.Div([
@@ -62,16 +48,6 @@ def create_header():
 
 
 # Callback function to fetch and display data from API
-@app.callback(
-    [Output('output-data', 'children'),
-     Output('pH-value', 'children'),
-     Output('TDS-value', 'children'),
-     Output('Depth-value', 'children'),
-     Output('FlowInd-value', 'children'),
-     Output('graph-output', 'figure')],
-    [Input('duration-dropdown', 'value'),
-     Input('column-dropdown', 'value')],
-)
 def update_data(selected_duration, selected_column):
     try:
         # Fetch data from API
@@ -128,7 +104,25 @@ def update_data(selected_duration, selected_column):
         return [f"An error occurred: {str(e)}"] + ["Error"] * 4 + [go.Figure()]
 
 
+# Application factory, as in main1.1: importing this module builds nothing
+def create_app():
+    server = Flask(__name__)
+    server.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
+    app = dash.Dash(__name__, server=server, url_base_pathname='/dashboard/')
+    app.callback(
+        [Output('output-data', 'children'),
+         Output('pH-value', 'children'),
+         Output('TDS-value', 'children'),
+         Output('Depth-value', 'children'),
+         Output('FlowInd-value', 'children'),
+         Output('graph-output', 'figure')],
+        [Input('duration-dropdown', 'value'),
+         Input('column-dropdown', 'value')],
+    )(update_data)
+    return server
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5080))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
-    server.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Per-stage latency, row count and payload size histograms, rendered in the
+# Prometheus text format by render(). Off unless NP_METRICS=1 (or enable() is
+# called); while off every hook is a single flag check. Values are per
+# process, so each gunicorn worker reports its own.
+
+_enabled = os.environ.get("NP_METRICS", "0") == "1"
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        # stage -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, value):
+        with self._lock:
+            series = self._series.get(stage)
+            if series is None:
+                series = self._series[stage] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {stage: (list(counts), total, count) for stage, (counts, total, count) in self._series.items()}
+        for stage in sorted(series):
+            counts, total, count = series[stage]
+            cumulative = 0
+            for bound, n in zip(self.buckets + [float("inf")], counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {total:g}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram("np_stage_duration_seconds", "Time spent in each processing stage.",
+                          [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30])
+STAGE_ROWS = Histogram("np_stage_rows", "Rows produced by each processing stage.",
+                       [10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000])
+PAYLOAD_BYTES = Histogram("np_payload_bytes", "Size of payloads received or sent by each stage.",
+                          [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000])
+HISTOGRAMS = [STAGE_SECONDS, STAGE_ROWS, PAYLOAD_BYTES]
+
+
+class _StageTimer:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_STAGE = nullcontext()
+
+
+# with stage("to_datetime"): ... times the block
+def stage(name):
+    return _StageTimer(name) if _enabled else _NULL_STAGE
+
+
+# Decorator timing every call of the function; with rows=True the length of
+# the result (rows of a frame, records of a list) is recorded as well
+def timed(name, rows=False):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(name, time.perf_counter() - start)
+            if rows and result is not None and hasattr(result, "__len__"):
+                STAGE_ROWS.observe(name, len(result))
+            return result
+        return wrapper
+    return decorator
+
+
+def observe_rows(name, n):
+    if _enabled:
+        STAGE_ROWS.observe(name, n)
+
+
+def observe_bytes(name, n):
+    if _enabled:
+        PAYLOAD_BYTES.observe(name, n)
+
+
+def render():
+    return "\n".join(h.render() for h in HISTOGRAMS) + "\n"
+
+
+def reset():
+    for h in HISTOGRAMS:
+        h.reset()
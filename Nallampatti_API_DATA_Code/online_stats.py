@@ -0,0 +1,213 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+METRICS = ['FlowInd', 'Depth', 'TDS', 'pH']
+# TDS/pH read 0 when the probe is not reporting; like the rollups, their
+# statistics only use rows where both are non-zero
+VALID_ONLY = ['TDS', 'pH']
+WINDOWS = {'1h': 3600, '24h': 86400}  # label -> seconds
+EWMA_HALFLIFE = 3600  # seconds
+
+
+# Mean, variance, min and max of the samples in the last span seconds.
+# Samples must arrive in time order; each push and expiry is O(1) amortized:
+# mean/variance are updated incrementally (Welford, with removal) and min/max
+# come from monotonic deques.
+class RollingWindow:
+    def __init__(self, span):
+        self.span = span
+        self._samples = deque()
+        self._min = deque()
+        self._max = deque()
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, t, x):
+        self._samples.append((t, x))
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((t, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((t, x))
+        self.expire(t)
+
+    def expire(self, now):
+        cutoff = now - self.span
+        while self._samples and self._samples[0][0] <= cutoff:
+            _, x = self._samples.popleft()
+            self.count -= 1
+            if self.count == 0:
+                self.mean = self._m2 = 0.0
+            else:
+                delta = x - self.mean
+                self.mean -= delta / self.count
+                self._m2 = max(self._m2 - delta * (x - self.mean), 0.0)
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+
+# Exponentially weighted mean with a half-life in seconds, so irregular
+# sampling (gaps) weighs old values by elapsed time rather than sample count
+class Ewma:
+    def __init__(self, halflife):
+        self.halflife = halflife
+        self.value = None
+        self._t = None
+
+    def push(self, t, x):
+        if self.value is None:
+            self.value = x
+        else:
+            alpha = 1.0 - 0.5 ** ((t - self._t) / self.halflife)
+            self.value += alpha * (x - self.value)
+        self._t = t
+
+
+class MetricStats:
+    def __init__(self, windows=WINDOWS, halflife=EWMA_HALFLIFE):
+        self.windows = {label: RollingWindow(span) for label, span in windows.items()}
+        self.ewma = Ewma(halflife)
+        self.latest = None
+        self.latest_at = None
+        # 'ok', 'low' or 'high' against the thresholds; anomalous while the
+        # last sample was an outlier
+        self.state = 'ok'
+        self.anomalous = False
+
+
+# Rolling statistics and alerts per metric, fed incrementally with the rows
+# of each new snapshot that are newer than anything seen so far. The first
+# feed only reads back as far as the longest window, so the cost never
+# depends on the length of the history.
+#
+# thresholds: {metric: (low, high)}, either bound may be None. A 'high' or
+# 'low' event is raised when a metric leaves its range and a 'normal' event
+# when it returns. An 'anomaly' event is raised when a sample is more than
+# z_threshold standard deviations from the mean of the longest window (once
+# it holds min_count samples).
+class OnlineStats:
+    def __init__(self, metrics=METRICS, windows=WINDOWS, halflife=EWMA_HALFLIFE, thresholds=None,
+                 z_threshold=4.0, min_count=36, max_events=100, timestamp_column='timestamp'):
+        self.metrics = list(metrics)
+        self.windows = dict(windows)
+        self.thresholds = thresholds or {}
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.timestamp_column = timestamp_column
+        self._baseline = max(self.windows, key=self.windows.get)
+        self._stats = {m: MetricStats(self.windows, halflife) for m in self.metrics}
+        self._events = deque(maxlen=max_events)
+        self._last = None
+        self._lock = threading.Lock()
+
+    # Feeds the rows of a time-sorted frame that are newer than the last fed
+    # sample; returns the number of rows read
+    def feed(self, df):
+        if df is None or len(df) == 0:
+            return 0
+        timestamps = df[self.timestamp_column].values
+        with self._lock:
+            if self._last is None:
+                oldest = timestamps[-1] - np.timedelta64(max(self.windows.values()), 's')
+                start = timestamps.searchsorted(oldest, side='right')
+            else:
+                start = timestamps.searchsorted(self._last, side='right')
+            if start >= len(timestamps):
+                return 0
+
+            seconds = timestamps[start:].astype("datetime64[ns]").astype(np.int64) / 1e9
+            columns = {m: df[m].values[start:].astype(np.float64) for m in self.metrics if m in df}
+            valid = np.ones(len(seconds), dtype=bool)
+            for m in VALID_ONLY:
+                if m in columns:
+                    valid &= columns[m] != 0
+            for m, values in columns.items():
+                usable = ~np.isnan(values)
+                if m in VALID_ONLY:
+                    usable &= valid
+                for t, x in zip(seconds[usable].tolist(), values[usable].tolist()):
+                    self._push(m, t, x)
+            self._last = timestamps[-1]
+            return len(seconds)
+
+    def _push(self, metric, t, x):
+        stats = self._stats[metric]
+        baseline = stats.windows[self._baseline]
+        # Judge the sample against the window before it is added
+        if baseline.count >= self.min_count and baseline.std > 0:
+            z = (x - baseline.mean) / baseline.std
+            outlier = abs(z) > self.z_threshold
+            if outlier and not stats.anomalous:
+                self._event(t, metric, 'anomaly', x, f"{metric} {x:g} is {z:+.1f} sd from its {self._baseline} mean "
+                                                      f"{baseline.mean:.2f}")
+            stats.anomalous = outlier
+
+        low, high = self.thresholds.get(metric, (None, None))
+        state = 'high' if high is not None and x > high else 'low' if low is not None and x < low else 'ok'
+        if state != stats.state:
+            if state == 'ok':
+                self._event(t, metric, 'normal', x, f"{metric} back in range at {x:g}")
+            else:
+                limit = high if state == 'high' else low
+                self._event(t, metric, state, x, f"{metric} {state} at {x:g} (limit {limit:g})")
+            stats.state = state
+
+        for window in stats.windows.values():
+            window.push(t, x)
+        stats.ewma.push(t, x)
+        stats.latest, stats.latest_at = x, t
+
+    def _event(self, t, metric, kind, value, message):
+        self._events.append({'time': pd.Timestamp(t, unit='s'), 'metric': metric, 'kind': kind,
+                             'value': value, 'message': message})
+
+    # Latest value, EWMA, threshold state and per-window statistics of one
+    # metric. Windows are aged to the newest fed sample of any metric, so a
+    # metric that stopped reporting does not keep old statistics.
+    def summary(self, metric):
+        with self._lock:
+            stats = self._stats[metric]
+            now = pd.Timestamp(self._last).value / 1e9 if self._last is not None else None
+            windows = {}
+            for label, window in stats.windows.items():
+                if now is not None:
+                    window.expire(now)
+                windows[label] = {'count': window.count, 'mean': window.mean if window.count else None,
+                                  'std': window.std if window.count else None, 'min': window.min, 'max': window.max}
+            latest_at = pd.Timestamp(stats.latest_at, unit='s') if stats.latest_at is not None else None
+            return {'latest': stats.latest, 'latest_at': latest_at, 'ewma': stats.ewma.value,
+                    'state': stats.state, 'windows': windows}
+
+    # Most recent events first
+    def events(self, limit=None):
+        with self._lock:
+            events = list(self._events)[::-1]
+        return events[:limit] if limit else events
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+
+
+# Refreshes a shared snapshot on a background thread. Callbacks only read the
+# latest snapshot, so their latency does not depend on the upstream API and
+# upstream load does not grow with the number of open dashboards.
+# updated_at(snapshot), when given, reports when the snapshot was produced
+# (e.g. published by another process); by default that is when it was loaded.
+class SnapshotPoller:
+    def __init__(self, load, interval=60, updated_at=None):
+        self.load = load
+        self.interval = interval
+        self.updated_at = updated_at
+        self._snapshot = None
+        self._updated_at = None
+        self._error = None
+        self._lock = threading.Lock()
+        # Held for the duration of a load so the background loop and
+        # on-demand refreshes never hit the upstream at the same time
+        self._refreshing = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    # A failed load keeps the last good snapshot and only records the error
+    def refresh(self, blocking=True):
+        if not self._refreshing.acquire(blocking=blocking):
+            return False
+        try:
+            try:
+                snapshot = self.load()
+            except Exception as e:
+                with self._lock:
+                    self._error = e
+                return False
+            updated_at = self.updated_at(snapshot) if self.updated_at else None
+            with self._lock:
+                self._snapshot = snapshot
+                self._updated_at = updated_at or time.time()
+                self._error = None
+            return True
+        finally:
+            self._refreshing.release()
+
+    def refresh_async(self):
+        threading.Thread(target=self.refresh, args=(False,), name="snapshot-refresh", daemon=True).start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    # Starts the thread once per process. Safe to call repeatedly; a forked
+    # worker (e.g. gunicorn --preload) gets its own thread on first use.
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="snapshot-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def status(self):
+        with self._lock:
+            return self._snapshot, self._updated_at, self._error
+
+    # Seconds since the last successful load, None before the first one
+    def age(self):
+        with self._lock:
+            return None if self._updated_at is None else time.time() - self._updated_at
+
+    # Stale-while-revalidate read: returns (snapshot, age, error) at once and,
+    # when the snapshot is older than max_age, starts a refresh in the
+    # background unless one is already running
+    def get(self, max_age):
+        with self._lock:
+            snapshot, updated_at, error = self._snapshot, self._updated_at, self._error
+        age = None if updated_at is None else time.time() - updated_at
+        if (age is None or age > max_age) and not self._refreshing.locked():
+            self.refresh_async()
+        return snapshot, age, error
@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+
+import requests
+
+# Retry and circuit-breaker helpers for calls to the upstream API. Results of
+# None count as failures, since get_data reports failed requests that way.
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+# Exceptions worth retrying: network trouble and failed (None) responses
+RETRY_ON = (requests.RequestException, UpstreamError)
+
+
+# Full-jitter exponential backoff: attempt i waits a random time between 0
+# and min(max_delay, base_delay * 2**i)
+def backoff_delay(attempt, base_delay=0.5, max_delay=8.0):
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def call_with_retry(fn, *args, attempts=3, base_delay=0.5, max_delay=8.0, retry_on=RETRY_ON,
+                    sleep=time.sleep, **kwargs):
+    for attempt in range(attempts):
+        try:
+            result = fn(*args, **kwargs)
+            if result is None:
+                raise UpstreamError(f"{getattr(fn, '__name__', 'call')} returned no data")
+            return result
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            sleep(backoff_delay(attempt, base_delay, max_delay))
+
+
+# Stops calling a failing upstream: after failure_threshold consecutive
+# failures the circuit opens and calls fail fast with CircuitOpenError. After
+# reset_timeout seconds one trial call is let through (half-open); its result
+# closes or re-opens the circuit.
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self.clock()
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError("Upstream circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+# fn wrapped with bounded retries inside a circuit breaker: a retried call
+# that still fails counts as one failure, and an open circuit skips the
+# retries entirely
+def resilient(fn, breaker, **retry_kwargs):
+    def call(*args, **kwargs):
+        return breaker.call(call_with_retry, fn, *args, **retry_kwargs, **kwargs)
+    return call
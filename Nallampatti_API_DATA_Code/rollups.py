@@ -0,0 +1,211 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+METRICS = ['FlowInd', 'Depth', 'TDS', 'pH']
+FREQS = {'hourly': 'h', 'daily': 'D', 'weekly': 'W-MON', 'monthly': 'ME'}
+
+# Which rows feed the means of each granularity, following data_process1:
+# 'valid' drops rows with TDS == 0 or pH == 0 for every metric, 'all' keeps
+# every row, 'split' keeps every row for FlowInd/Depth but only valid rows for
+# TDS/pH (the daily merge).
+MEAN_RULES = {'hourly': 'valid', 'daily': 'split', 'weekly': 'all', 'monthly': 'valid'}
+
+SUM_COLUMNS = ['count', 'valid_count'] + [f'{m}_sum' for m in METRICS] + [f'{m}_valid_sum' for m in METRICS]
+
+
+# Bucket label of every timestamp, matching the labels resample() produces
+# for each granularity. Day numbers are computed once and reused.
+def bucket_labels(timestamps, granularity, days=None):
+    timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+    if granularity == 'hourly':
+        return timestamps.astype("datetime64[h]").astype("datetime64[ns]")
+    if days is None:
+        days = timestamps.astype("datetime64[D]")
+    if granularity == 'daily':
+        return days.astype("datetime64[ns]")
+    if granularity == 'weekly':
+        # 1970-01-01 was a Thursday; label each day with the Monday closing its week
+        weekday = (days.astype(np.int64) + 3) % 7
+        return (days + (7 - weekday) % 7).astype("datetime64[ns]")
+    if granularity == 'monthly':
+        month_end = (days.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+        return month_end.astype("datetime64[ns]")
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def valid_mask(df):
+    return ((df['TDS'] != 0) & (df['pH'] != 0)).values
+
+
+def empty_partials():
+    return pd.DataFrame({col: pd.Series(dtype=np.float64) for col in SUM_COLUMNS},
+                        index=pd.DatetimeIndex([], name='timestamp'))
+
+
+# Per-bucket sums and counts for one granularity. These are additive, so
+# partials from different batches (or partitions) can simply be added.
+def partial_sums(df, granularity, labels=None, valid=None):
+    if df.empty:
+        return empty_partials()
+    if labels is None:
+        labels = bucket_labels(df['timestamp'].values, granularity)
+    if valid is None:
+        valid = valid_mask(df)
+
+    # Grouped sums use the same compensated summation as resample().mean(),
+    # so sum / count reproduces the filter functions' means exactly. Valid
+    # sums are taken over the valid rows only for the same reason.
+    values = pd.DataFrame({m: df[m].values.astype(np.float64) for m in METRICS},
+                          index=pd.DatetimeIndex(labels, name='timestamp'))
+    grouped = values.groupby(level=0, sort=True)
+    valid_grouped = values[valid].groupby(level=0, sort=True)
+    totals = grouped.sum()
+    valid_totals = valid_grouped.sum().reindex(totals.index, fill_value=0.0)
+
+    columns = {
+        'count': grouped.size().astype(np.float64),
+        'valid_count': valid_grouped.size().reindex(totals.index, fill_value=0).astype(np.float64),
+    }
+    columns.update({f'{m}_sum': totals[m] for m in METRICS})
+    columns.update({f'{m}_valid_sum': valid_totals[m] for m in METRICS})
+    return pd.DataFrame(columns)
+
+
+def combine_partials(parts):
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return empty_partials()
+    return pd.concat(parts).groupby(level=0, sort=True).sum()
+
+
+def _means(partials, granularity, count_col, suffix, metrics):
+    nonempty = partials.index[partials[count_col] > 0]
+    if len(nonempty) == 0:
+        return None
+    index = pd.date_range(nonempty[0], nonempty[-1], freq=FREQS[granularity], name='timestamp')
+    table = partials.reindex(index)
+    counts = table[count_col].where(table[count_col] > 0)
+    return pd.DataFrame({m: table[f'{m}{suffix}'] / counts for m in metrics}, index=index)
+
+
+# Turns partial sums into the table the matching filter_data_* function returns
+def finalize(partials, granularity):
+    rule = MEAN_RULES[granularity]
+    if rule == 'all':
+        result = _means(partials, granularity, 'count', '_sum', METRICS)
+    elif rule == 'valid':
+        result = _means(partials, granularity, 'valid_count', '_valid_sum', METRICS)
+    else:
+        water = _means(partials, granularity, 'count', '_sum', ['FlowInd', 'Depth'])
+        tds_ph = _means(partials, granularity, 'valid_count', '_valid_sum', ['TDS', 'pH'])
+        result = None if water is None or tds_ph is None else water.join(tds_ph, how='inner')
+
+    if result is None:
+        empty = {'timestamp': pd.Series(dtype="datetime64[ns]")}
+        empty.update({m: pd.Series(dtype=np.float64) for m in METRICS})
+        return pd.DataFrame(empty)
+    return result.reset_index()
+
+
+def _parse_day(value):
+    return np.datetime64(parser.parse(value).date(), 'ns')
+
+
+# Keeps sum/count tables per hour, day, week and month. New samples only
+# touch their own buckets, and range queries read bucket rows instead of raw
+# samples.
+class RollupEngine:
+    def __init__(self):
+        self.tables = {g: empty_partials() for g in FREQS}
+        self._lock = threading.Lock()
+
+    def update(self, new_df):
+        if new_df.empty:
+            return
+        partials = self._partials(new_df)
+        with self._lock:
+            for granularity in FREQS:
+                self.tables[granularity] = self._merge(self.tables[granularity], partials[granularity])
+
+    # update() for many frames, e.g. a store read a month at a time: the
+    # partial sums of every frame are combined with the tables in one pass
+    # instead of one merge per frame
+    def update_many(self, frames):
+        parts = {granularity: [] for granularity in FREQS}
+        for df in frames:
+            if not df.empty:
+                for granularity, partials in self._partials(df).items():
+                    parts[granularity].append(partials)
+        with self._lock:
+            for granularity in FREQS:
+                if parts[granularity]:
+                    self.tables[granularity] = combine_partials([self.tables[granularity]] + parts[granularity])
+
+    @staticmethod
+    def _partials(df):
+        timestamps = df['timestamp'].values.astype("datetime64[ns]")
+        days = timestamps.astype("datetime64[D]")
+        valid = valid_mask(df)
+        return {granularity: partial_sums(df, granularity, bucket_labels(timestamps, granularity, days=days), valid)
+                for granularity in FREQS}
+
+    @staticmethod
+    def _merge(table, partials):
+        common = partials.index.intersection(table.index)
+        if len(common):
+            table.loc[common] += partials.loc[common]
+        new = partials.index.difference(table.index)
+        if len(new):
+            table = pd.concat([table, partials.loc[new]])
+            if not table.index.is_monotonic_increasing:
+                table = table.sort_index()
+        return table
+
+    def _slice(self, granularity, start, end):
+        table = self.tables[granularity]
+        lo = table.index.searchsorted(start, side='left') if start is not None else 0
+        hi = table.index.searchsorted(end, side='left') if end is not None else len(table)
+        return table.iloc[lo:hi]
+
+    def partials(self, granularity, from_date=None, to_date=None):
+        start = _parse_day(from_date) if from_date else None
+        end = _parse_day(to_date) + np.timedelta64(1, 'D') if to_date else None
+
+        with self._lock:
+            if granularity in ('hourly', 'daily'):
+                return self._slice(granularity, start, end).copy()
+
+            # Buckets fully inside the range come straight from the coarse
+            # table; the partially covered ones at the edges are rebuilt from
+            # the daily table.
+            table = self.tables[granularity]
+            labels = table.index.values
+            first_day = _bucket_first_day(labels, granularity)
+            inside = np.ones(len(labels), dtype=bool)
+            if start is not None:
+                inside &= first_day >= start
+            if end is not None:
+                inside &= labels < end
+            interior = table[inside]
+
+            daily = self._slice('daily', start, end)
+            day_labels = bucket_labels(daily.index.values, granularity)
+            edges = daily[~np.isin(day_labels, interior.index.values)]
+            edge_labels = bucket_labels(edges.index.values, granularity)
+            edges = edges.groupby(pd.DatetimeIndex(edge_labels, name='timestamp')).sum()
+        return combine_partials([interior, edges])
+
+    def query(self, granularity, from_date=None, to_date=None):
+        return finalize(self.partials(granularity, from_date, to_date), granularity)
+
+
+def _bucket_first_day(labels, granularity):
+    labels = np.asarray(labels, dtype="datetime64[ns]")
+    if granularity == 'weekly':
+        return labels - np.timedelta64(6, 'D')
+    if granularity == 'monthly':
+        return labels.astype("datetime64[M]").astype("datetime64[ns]")
+    return labels
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process owner election
+    fcntl = None
+
+# RAM-backed where available, so attaching workers share page cache pages
+# instead of reading from disk
+SNAPSHOT_ROOT = os.environ.get(
+    "SNAPSHOT_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+KEEP_VERSIONS = 3
+
+
+# Creates path as a directory only this user can use, or checks that an
+# existing one is: anyone who can write to it decides what every worker
+# serves (and can hold the owner lock). Raises PermissionError otherwise.
+def _private_dir(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if not hasattr(os, "getuid"):
+        return
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by uid {os.getuid()} with mode 0700")
+
+
+# A DataFrame published by one process and read by many. Each version is a
+# directory of .npy columns plus meta.json; CURRENT names the latest version
+# and is replaced atomically, so readers never lock and never see a partial
+# version. Readers memory-map the columns read-only, so every worker's frame
+# is a view over the same pages. Versions are removed once KEEP_VERSIONS
+# newer ones exist; a reader that still maps one keeps its pages until it
+# lets go.
+#
+# The directory is private to the user (see _private_dir) and nothing in it
+# is unpickled: string columns are stored as fixed-width text plus a mask of
+# missing values, and other object columns are left out.
+class SharedSnapshot:
+    def __init__(self, name, root=SNAPSHOT_ROOT):
+        user = f"{os.getuid()}-" if hasattr(os, "getuid") else ""
+        self.path = os.path.join(root, f"np-snapshot-{user}{name}")
+        _private_dir(self.path)
+        self._version = None
+        self._frame = None
+        self._meta = None
+        self._lock = threading.Lock()
+        self._owner_fd = None
+        self._owner_pid = None
+
+    @classmethod
+    def for_source(cls, source, root=SNAPSHOT_ROOT):
+        return cls(hashlib.blake2b(source.encode(), digest_size=8).hexdigest(), root)
+
+    # True in the one process holding the owner lock. Non-blocking; a process
+    # that exits releases the lock and the next caller takes over.
+    def acquire_owner(self):
+        if fcntl is None:
+            return True
+        if self._owner_fd is not None and self._owner_pid == os.getpid():
+            return True
+        fd = os.open(os.path.join(self.path, "owner.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._owner_fd, self._owner_pid = fd, os.getpid()
+        return True
+
+    def publish(self, df):
+        version = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        tmp = os.path.join(self.path, f".tmp-{version}")
+        os.makedirs(tmp)
+        columns = []
+        for i, name in enumerate(df.columns):
+            values = df[name].to_numpy()
+            kind = "array"
+            if values.dtype == object:
+                missing = pd.isna(values)
+                if not all(isinstance(v, str) for v in values[~missing]):
+                    print(f"Column {name} is not shared: only strings can be stored for object columns")
+                    continue
+                np.save(os.path.join(tmp, f"{i}.missing.npy"), missing)
+                values = np.where(missing, "", values).astype(str)
+                kind = "string"
+            np.save(os.path.join(tmp, f"{i}.npy"), values, allow_pickle=False)
+            columns.append({"name": name, "file": i, "kind": kind})
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"version": version, "published_at": time.time(), "rows": len(df), "columns": columns}, f)
+        os.rename(tmp, os.path.join(self.path, version))
+
+        pointer = os.path.join(self.path, f".current-{version}")
+        with open(pointer, "w") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(self.path, "CURRENT"))
+        self._prune()
+        return version
+
+    def _prune(self):
+        versions = sorted(name for name in os.listdir(self.path) if not name.startswith(".") and "-" in name)
+        for name in versions[:-KEEP_VERSIONS]:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _read_pointer(self):
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _attach(self, version):
+        path = os.path.join(self.path, version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        columns = {}
+        for column in meta["columns"]:
+            file = os.path.join(path, f"{column['file']}.npy")
+            if column["kind"] == "string":
+                # Read back as a copy of Python strings, as the column was
+                values = np.load(file).astype(object)
+                values[np.load(os.path.join(path, f"{column['file']}.missing.npy"))] = np.nan
+                columns[column["name"]] = values
+            else:
+                columns[column["name"]] = np.load(file, mmap_mode="r")
+        return pd.DataFrame(columns, copy=False), meta
+
+    # The latest published frame (None before the first publish). Only the
+    # CURRENT pointer is read when nothing changed.
+    def current(self):
+        for _ in range(3):
+            version = self._read_pointer()
+            if version is None:
+                return None
+            with self._lock:
+                if version == self._version:
+                    return self._frame
+            try:
+                frame, meta = self._attach(version)
+            except FileNotFoundError:
+                # Pruned between reading CURRENT and opening it; re-read
+                continue
+            with self._lock:
+                self._version, self._frame, self._meta = version, frame, meta
+            return frame
+        return None
+
+    # time.time() of the latest publish, None before the first one
+    def published_at(self):
+        version = self._read_pointer()
+        if version is None:
+            return None
+        with self._lock:
+            if version == self._version:
+                return self._meta["published_at"]
+        try:
+            with open(os.path.join(self.path, version, "meta.json")) as f:
+                return json.load(f)["published_at"]
+        except FileNotFoundError:
+            return None
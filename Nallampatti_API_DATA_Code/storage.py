@@ -0,0 +1,131 @@
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+STORE_DIR = os.environ.get("NP_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_store"))
+METRICS = ['FlowInd', 'Depth', 'TDS', 'pH']
+# Written when present (compact frames' validity bitmask); partitions written
+# without it read back as fully valid
+VALID_COLUMN = 'valid'
+
+
+# Day-partitioned columnar store for preprocessed samples. Each day is a
+# directory (YYYY-MM-DD) holding one .npy file per column; reads memory-map
+# only the partitions that overlap the requested date range.
+class SensorStore:
+    def __init__(self, root=STORE_DIR, metrics=METRICS):
+        self.root = root
+        self.metrics = list(metrics)
+        os.makedirs(self.root, exist_ok=True)
+
+    def partitions(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if len(name) == 10 and not name.startswith("."))
+
+    def _load_partition(self, day, mmap_mode="r"):
+        path = os.path.join(self.root, day)
+        columns = {'timestamp': np.load(os.path.join(path, "timestamp.npy"), mmap_mode=mmap_mode)}
+        for col in self.metrics:
+            columns[col] = np.load(os.path.join(path, f"{col}.npy"), mmap_mode=mmap_mode)
+        valid_path = os.path.join(path, f"{VALID_COLUMN}.npy")
+        if os.path.exists(valid_path):
+            columns[VALID_COLUMN] = np.load(valid_path, mmap_mode=mmap_mode)
+        return columns
+
+    def _write_partition(self, day, columns):
+        tmp = os.path.join(self.root, f".tmp-{day}-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), values)
+
+        # Swap the whole directory so readers never see a half-written day
+        target = os.path.join(self.root, day)
+        old = None
+        if os.path.exists(target):
+            old = os.path.join(self.root, f".old-{day}-{uuid.uuid4().hex}")
+            os.rename(target, old)
+        os.rename(tmp, target)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def write(self, df):
+        if df.empty:
+            return
+        timestamps = df['timestamp'].values
+        if np.issubdtype(timestamps.dtype, np.integer):
+            # Compact frames carry epoch seconds
+            timestamps = timestamps.astype(np.int64).astype("datetime64[s]")
+        timestamps = timestamps.astype("datetime64[ns]")
+        days = timestamps.astype("datetime64[D]")
+        for day in np.unique(days):
+            mask = days == day
+            columns = {'timestamp': timestamps[mask]}
+            for col in self.metrics:
+                columns[col] = df[col].values[mask].astype(np.float64) if col in df else np.zeros(mask.sum())
+            if VALID_COLUMN in df:
+                columns[VALID_COLUMN] = df[VALID_COLUMN].values[mask].astype(np.uint8)
+
+            name = str(day)
+            if os.path.exists(os.path.join(self.root, name)):
+                existing = _with_valid(self._load_partition(name, mmap_mode=None), VALID_COLUMN in columns)
+                columns = _with_valid(columns, VALID_COLUMN in existing)
+                merged = {key: np.concatenate([existing[key], columns[key]]) for key in columns}
+                # Keep the newest copy of any timestamp written twice
+                _, last = np.unique(merged['timestamp'][::-1], return_index=True)
+                keep = len(merged['timestamp']) - 1 - last
+                columns = {key: values[keep] for key, values in merged.items()}
+            else:
+                order = np.argsort(columns['timestamp'], kind="stable")
+                columns = {key: values[order] for key, values in columns.items()}
+            self._write_partition(name, columns)
+
+    def read(self, from_date=None, to_date=None):
+        start = parser.parse(from_date).date().isoformat() if from_date else None
+        end = parser.parse(to_date).date().isoformat() if to_date else None
+        days = [day for day in self.partitions()
+                if (start is None or day >= start) and (end is None or day <= end)]
+        if not days:
+            return pd.DataFrame(columns=['timestamp'] + self.metrics)
+
+        return self._concat([self._load_partition(day) for day in days])
+
+    def _concat(self, parts, tail=None):
+        keys = ['timestamp'] + self.metrics
+        if any(VALID_COLUMN in part for part in parts):
+            parts = [_with_valid(part, True) for part in parts]
+            keys.append(VALID_COLUMN)
+        start = -tail if tail else None
+        return pd.DataFrame({key: np.concatenate([part[key] for part in parts])[start:] for key in keys})
+
+    # The newest max_rows samples, opening partitions newest first and only
+    # as many as needed
+    def read_latest(self, max_rows):
+        days = []
+        rows = 0
+        for day in reversed(self.partitions()):
+            if rows >= max_rows:
+                break
+            days.append(day)
+            rows += np.load(os.path.join(self.root, day, "timestamp.npy"), mmap_mode="r").shape[0]
+        if not days:
+            return pd.DataFrame(columns=['timestamp'] + self.metrics)
+
+        return self._concat([self._load_partition(day) for day in reversed(days)], tail=max_rows)
+
+    def latest_timestamp(self):
+        days = self.partitions()
+        if not days:
+            return None
+        return pd.Timestamp(self._load_partition(days[-1])['timestamp'][-1]).to_pydatetime()
+
+
+# Adds an all-valid bitmask to partitions that were written without one
+def _with_valid(columns, needed):
+    if needed and VALID_COLUMN not in columns:
+        columns = dict(columns)
+        columns[VALID_COLUMN] = np.full(len(columns['timestamp']), 0xFF, dtype=np.uint8)
+    return columns
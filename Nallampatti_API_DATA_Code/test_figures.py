@@ -0,0 +1,44 @@
+import numpy as np
+
+from downsample import downsample
+from figures import MAX_PATCH_GROWTH, extend_figure, figure_state
+
+WINDOW = np.timedelta64(7, 'D')
+
+
+# The state the client holds after the patch is applied
+def apply(state, patch):
+    x = list(state['x'])
+    for op in patch.to_plotly_json()['operations']:
+        if op['operation'] == 'Extend':
+            x.extend(op['params']['value'])
+        elif op['operation'] == 'Delete':
+            del x[op['location'][-1]]
+    return dict(state, x=x)
+
+
+def test_ticks_on_a_downsampled_window_rebuild_before_growing_back():
+    x = np.arange(np.datetime64('2024-01-01'), np.datetime64('2024-01-29'), np.timedelta64(10, 'm'))
+    y = np.sin(np.arange(len(x)) / 50.0)
+    target = 600
+
+    def build(end):
+        window = (x > x[end] - WINDOW) & (np.arange(len(x)) <= end)
+        lo = int(np.argmax(window))
+        kept = lo + downsample(x[window], y[window], target)
+        return figure_state('pH', '1 Week', x[kept])
+
+    end = 7 * 144
+    state = build(end)
+    rebuilds = 0
+    for end in range(end + 1, len(x)):
+        window = (x > x[end] - WINDOW) & (np.arange(len(x)) <= end)
+        update = extend_figure(state, x[window], y[window], x[end] - WINDOW, target)
+        if update is None:
+            state = build(end)
+            rebuilds += 1
+        else:
+            state = apply(state, update[1])
+        assert len(state['x']) <= target * MAX_PATCH_GROWTH
+    # A raw sample per tick; most ticks stay patches
+    assert 0 < rebuilds < (len(x) - 7 * 144) / 50
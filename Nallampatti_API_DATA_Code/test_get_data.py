@@ -0,0 +1,110 @@
+import pytest
+
+from api_stub import start_stub
+from get_data import fetch_data_from_api, get_client
+from poller import SnapshotPoller
+from resilience import CircuitBreaker, CircuitOpenError, UpstreamError, resilient
+
+
+def _serve(**kwargs):
+    httpd, url = start_stub(**kwargs)
+    yield httpd, url
+    get_client(url).close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    yield from _serve()
+
+
+@pytest.fixture
+def failing_stub():
+    yield from _serve(fail_rate=1.0)
+
+
+# A breaker on a clock the test moves by hand
+@pytest.fixture
+def breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=lambda: now[0])
+    breaker.now = now
+    return breaker
+
+
+def test_token_is_reused_across_fetches(stub):
+    httpd, url = stub
+    for _ in range(20):
+        assert fetch_data_from_api(url)
+    assert httpd.state.token_requests == 1
+
+
+def test_revoked_token_is_refreshed_once(stub):
+    httpd, url = stub
+    assert fetch_data_from_api(url)
+    httpd.state.tokens.clear()
+    # The 401 fetches a new token and retries with it
+    for _ in range(5):
+        assert fetch_data_from_api(url)
+    assert httpd.state.token_requests == 2
+
+
+def test_breaker_opens_and_fails_fast(failing_stub, breaker):
+    httpd, url = failing_stub
+    fetch = resilient(fetch_data_from_api, breaker, attempts=2, sleep=lambda s: None)
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(UpstreamError) as e:
+            fetch(url)
+        assert not isinstance(e.value, CircuitOpenError)
+    assert breaker.state == "open"
+    assert httpd.state.data_requests == 2 * breaker.failure_threshold
+
+    with pytest.raises(CircuitOpenError):
+        fetch(url)
+    assert httpd.state.data_requests == 2 * breaker.failure_threshold
+
+
+def test_breaker_closes_once_upstream_recovers(failing_stub, breaker):
+    httpd, url = failing_stub
+    states = []
+
+    def probe(url):
+        states.append(breaker.state)
+        return fetch_data_from_api(url)
+    fetch = resilient(probe, breaker, attempts=1)
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(UpstreamError):
+            fetch(url)
+    assert breaker.state == "open"
+
+    # Still failing after the timeout: one trial request, then open again
+    breaker.now[0] += 60
+    sent = httpd.state.data_requests
+    with pytest.raises(UpstreamError):
+        fetch(url)
+    assert httpd.state.data_requests == sent + 1
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        fetch(url)
+
+    httpd.state.fail_rate = 0.0
+    breaker.now[0] += 60
+    assert fetch(url)
+    assert states[-1] == "half-open"
+    assert breaker.state == "closed"
+
+
+def test_poller_keeps_last_snapshot_while_upstream_fails(stub, breaker):
+    httpd, url = stub
+    poller = SnapshotPoller(lambda: resilient(fetch_data_from_api, breaker, attempts=1)(url))
+    assert poller.refresh()
+    first = poller.snapshot()
+    assert first
+
+    httpd.state.fail_rate = 1.0
+    assert not poller.refresh()
+    snapshot, age, error = poller.get(max_age=3600)
+    assert snapshot is first
+    assert isinstance(error, UpstreamError)
+    assert age is not None
@@ -0,0 +1,38 @@
+import pytest
+
+from api_stub import generate_records, start_stub
+from get_data import fetch_data_from_api, fetch_frame_from_api, get_client
+from ingest import Ingestor
+
+
+@pytest.fixture
+def stub():
+    httpd, url = start_stub(generate_records(days=2))
+    yield httpd, url
+    get_client(url).close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+# The full history on every call, as from an API without ?since
+def _ignoring_since(fetch):
+    return lambda url, since=None: fetch(url)
+
+
+@pytest.mark.parametrize("fetch", [fetch_data_from_api, fetch_frame_from_api,
+                                   _ignoring_since(fetch_data_from_api), _ignoring_since(fetch_frame_from_api)])
+def test_refresh_appends_only_new_rows(stub, fetch):
+    httpd, url = stub
+    records = httpd.state.records
+    httpd.state.records = records[:100]
+    ingestor = Ingestor(url, fetch=fetch)
+    first = ingestor.refresh()
+    assert len(first) > 0
+    assert len(ingestor.refresh()) == 0
+
+    httpd.state.records = records
+    new = ingestor.refresh()
+    assert len(new) > 0
+    assert (new['timestamp'] > first['timestamp'].iloc[-1]).all()
+    assert ingestor.df['timestamp'].is_unique
+    assert ingestor.df['timestamp'].is_monotonic_increasing
@@ -0,0 +1,19 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from data_process1 import preprocess_data
+from json_stream import decode_stream
+
+
+def test_stream_decodes_timestamps_like_preprocess_data():
+    records = [{"timestamp": "01-Jan-2024 00:10:00", "pH": 7.5},
+               {"timestamp": "1-Jan-2024 00:00:00", "pH": None},
+               {"timestamp": "01-Jän-2024 00:20:00", "pH": 7.6},
+               {"timestamp": "01-Jan-2024 00:30:00\u0000", "pH": 7.7},
+               {"timestamp": None, "pH": 7.8}]
+    body = json.dumps(records).encode()
+    frame = decode_stream([body[:40], body[40:]], metrics=["pH"])
+    assert frame['timestamp'].dtype == np.dtype("datetime64[ns]")
+    pd.testing.assert_frame_equal(preprocess_data(frame), preprocess_data(records), check_dtype=False)
@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared_snapshot import SharedSnapshot
+
+
+def test_directory_is_private(tmp_path):
+    snapshot = SharedSnapshot("station", str(tmp_path))
+    assert os.stat(snapshot.path).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="no file ownership")
+def test_directory_others_can_write_is_refused(tmp_path):
+    snapshot = SharedSnapshot("station", str(tmp_path))
+    os.chmod(snapshot.path, 0o777)
+    with pytest.raises(PermissionError):
+        SharedSnapshot("station", str(tmp_path))
+
+
+def test_string_columns_round_trip_without_pickle(tmp_path):
+    df = pd.DataFrame({"timestamp": pd.date_range("2024-01-01", periods=3, freq="10min"),
+                       "pH": [7.5, 7.6, 7.7], "status": ["ok", None, "dropout"]})
+    SharedSnapshot("station", str(tmp_path)).publish(df)
+    frame = SharedSnapshot("station", str(tmp_path)).current()
+    pd.testing.assert_frame_equal(frame, df.assign(status=["ok", np.nan, "dropout"]))
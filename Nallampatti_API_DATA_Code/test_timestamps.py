@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from timestamps import TimestampDecoder
+
+
+def expected(values):
+    return pd.to_datetime(pd.Series(values, dtype=object), format="%d-%b-%Y %H:%M:%S", errors='coerce').values
+
+
+def test_changed_slow_path_row_is_decoded_again():
+    decoder = TimestampDecoder()
+    first = ["1-Jan-2024 00:00:00", "02-Jan-2024 00:00:00"]
+    second = ["5-Jan-2024 00:00:00", "02-Jan-2024 00:00:00", "03-Jan-2024 00:00:00"]
+    np.testing.assert_array_equal(decoder.decode(first), expected(first))
+    np.testing.assert_array_equal(decoder.decode(second), expected(second))
+    assert decoder.decode(second)[0] == np.datetime64("2024-01-05")
+
+
+def test_appended_rows_match_pandas():
+    decoder = TimestampDecoder()
+    history = pd.date_range("2024-01-01", periods=500, freq="10min").strftime("%d-%b-%Y %H:%M:%S").tolist()
+    history[100] = "31-Foo-2024 25:61:00"
+    history[200] = None
+    for end in (300, 400, 500):
+        np.testing.assert_array_equal(decoder.decode(history[:end]), expected(history[:end]))
+    history[150] = "1-Feb-2024 00:00:00"
+    np.testing.assert_array_equal(decoder.decode(history), expected(history))
+
+
+def test_fixed_width_bytes_match_pandas():
+    values = ["01-Jan-2024 00:10:00", "1-Jan-2024 00:00:00", "", "31-Foo-2024 25:61:00"]
+    result = TimestampDecoder().decode(np.array(values, dtype="S21"))
+    np.testing.assert_array_equal(result, expected(values))
@@ -0,0 +1,198 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = "%d-%b-%Y %H:%M:%S"
+# "01-Jan-2024 00:00:00"; one spare byte so longer strings are not truncated
+# into valid ones
+WIDTH = 20
+TEXT_DTYPE = f"S{WIDTH + 1}"
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+# Month abbreviation packed as one integer -> month number, as sorted lookup
+# arrays for searchsorted
+_MONTH_CODES = np.array([(ord(m[0]) << 16) | (ord(m[1]) << 8) | ord(m[2]) for m in MONTHS], dtype=np.int32)
+_MONTH_ORDER = np.argsort(_MONTH_CODES)
+_MONTH_SORTED = _MONTH_CODES[_MONTH_ORDER]
+
+_DIGITS = [0, 1, 7, 8, 9, 10, 12, 13, 15, 16, 18, 19]
+_SEPARATORS = {2: "-", 6: "-", 11: " ", 14: ":", 17: ":"}
+# Range pd.to_datetime can represent in nanoseconds; other years take the
+# slow path and come back as NaT there
+_MIN_YEAR, _MAX_YEAR = 1678, 2261
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int32)
+
+
+# Days since 1970-01-01 for a proleptic Gregorian date (month 1-12)
+def _days_from_civil(year, month, day):
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+# Decodes "%d-%b-%Y %H:%M:%S" strings column-wise: the ASCII bytes are laid
+# out as one row per character position, the numeric fields are read with
+# integer arithmetic and the month through a lookup table. Rows that are not
+# exactly in that form (wrong length or separators, lower-case months,
+# impossible dates, non-strings) are flagged in ok for the caller to hand to
+# pd.to_datetime. NumPy drops trailing NUL characters from fixed-width
+# strings, so text should come from _as_text, which blanks such values.
+def decode_fast(text):
+    n = len(text)
+    chars = text.view(np.uint8).reshape(n, WIDTH + 1).T.copy()
+    ok = chars[WIDTH] == 0
+    for pos, sep in _SEPARATORS.items():
+        ok &= chars[pos] == ord(sep)
+
+    digits = chars[_DIGITS] - np.uint8(ord("0"))
+    ok &= (digits <= 9).all(axis=0)
+    digits = digits.astype(np.int32)
+    day = digits[0] * 10 + digits[1]
+    year = digits[2] * 1000 + digits[3] * 100 + digits[4] * 10 + digits[5]
+    hour = digits[6] * 10 + digits[7]
+    minute = digits[8] * 10 + digits[9]
+    second = digits[10] * 10 + digits[11]
+
+    letters = chars[3:6].astype(np.int32)
+    packed = (letters[0] << 16) | (letters[1] << 8) | letters[2]
+    slot = np.minimum(np.searchsorted(_MONTH_SORTED, packed), len(MONTHS) - 1)
+    ok &= _MONTH_SORTED[slot] == packed
+    month = _MONTH_ORDER[slot] + 1
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = _MONTH_DAYS[month - 1] + (leap & (month == 2))
+    ok &= ((year >= _MIN_YEAR) & (year <= _MAX_YEAR) & (day >= 1) & (day <= month_days)
+           & (hour < 24) & (minute < 60) & (second < 60))
+
+    days = _days_from_civil(year, month, day).astype(np.int64)
+    seconds = days * 86400 + (hour * 3600 + minute * 60 + second)
+    result = np.where(ok, seconds * 1_000_000_000, np.iinfo(np.int64).min).view("datetime64[ns]")
+    return result, ok
+
+
+def _lengths(values):
+    try:
+        return np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    except TypeError:
+        return np.fromiter((len(v) if isinstance(v, str) else -1 for v in values), dtype=np.int64,
+                           count=len(values))
+
+
+def _as_text(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind in "SU":
+        try:
+            # Longer strings are cut to WIDTH + 1 characters, which still
+            # fails the length check. Fixed-width arrays hold no trailing
+            # NULs, so pd.to_datetime sees the same strings.
+            return values.astype(TEXT_DTYPE)
+        except UnicodeEncodeError:
+            pass
+    values = np.asarray(values, dtype=object)
+    lengths = _lengths(values)
+    try:
+        # Non-strings become their str() here; the slow path re-reads them
+        # from the original values
+        text = values.astype(TEXT_DTYPE)
+    except UnicodeEncodeError:
+        # Non-ASCII strings cannot be in the fixed format; blank them so they
+        # take the slow path
+        text = np.array([v if not isinstance(v, str) or v.isascii() else "" for v in values],
+                        dtype=object).astype(TEXT_DTYPE)
+    # The cast drops trailing NULs, so "01-Jan-2024 00:00:00\0" would pass as
+    # a timestamp that pd.to_datetime rejects. Anything that is not exactly
+    # WIDTH characters is blanked and left to the slow path.
+    text[lengths != WIDTH] = b""
+    return text
+
+
+# values[rows] as Python objects. Fixed-width bytes are read as the text
+# they hold, since pd.to_datetime does not parse bytes.
+def _take(values, rows):
+    if isinstance(values, np.ndarray):
+        taken = values[rows]
+        if taken.dtype.kind == "S":
+            taken = np.char.decode(taken, "ascii", "replace")
+        return taken.astype(object)
+    taken = np.empty(len(rows), dtype=object)
+    taken[:] = [values[i] for i in rows]
+    return taken
+
+
+# Same value and type; anything that does not compare cleanly (NaN, pd.NA) is
+# treated as changed and decoded again
+def _same(a, b):
+    try:
+        return a is b or (type(a) is type(b) and bool(a == b))
+    except (TypeError, ValueError):
+        return False
+
+
+# Remembers the strings and results of the previous call. The API returns the
+# same history on every refresh with new rows appended, so the rows shared
+# with the previous call are copied instead of decoded again. Rows that took
+# the slow path are blanked in the text, so their original values are kept
+# and compared as well.
+class TimestampDecoder:
+    def __init__(self):
+        self._text = None
+        self._result = None
+        self._slow_rows = None
+        self._slow_values = None
+        self._lock = threading.Lock()
+
+    def decode(self, values, date_format=DATE_FORMAT):
+        if date_format != DATE_FORMAT:
+            return pd.to_datetime(pd.Series(values), format=date_format, errors='coerce').values
+        values = values.values if isinstance(values, pd.Series) else values
+        if isinstance(values, np.ndarray) and values.dtype.kind not in "OSU":
+            # Already datetimes (or numbers); nothing to decode
+            return pd.to_datetime(pd.Series(values), format=date_format, errors='coerce').values
+        text = _as_text(values)
+        with self._lock:
+            last_text, last_result = self._text, self._result
+            last_slow_rows, last_slow_values = self._slow_rows, self._slow_values
+
+        reused = 0
+        if last_text is not None:
+            n = min(len(last_text), len(text))
+            differs = np.flatnonzero(last_text[:n] != text[:n])
+            reused = differs[0] if len(differs) else n
+            rows = last_slow_rows[last_slow_rows < reused]
+            if len(rows):
+                same = map(_same, _take(values, rows), last_slow_values[:len(rows)])
+                changed = np.fromiter((not s for s in same), dtype=bool, count=len(rows))
+                if changed.any():
+                    reused = rows[np.argmax(changed)]
+
+        result = np.empty(len(text), dtype="datetime64[ns]")
+        slow_rows = last_slow_rows[last_slow_rows < reused] if reused else np.empty(0, dtype=np.int64)
+        slow_values = last_slow_values[:len(slow_rows)] if reused else np.empty(0, dtype=object)
+        if reused:
+            result[:reused] = last_result[:reused]
+        if reused < len(text):
+            decoded, ok = decode_fast(text[reused:])
+            slow = np.flatnonzero(~ok)
+            if len(slow):
+                raw = _take(values, reused + slow)
+                decoded[slow] = pd.to_datetime(pd.Series(raw), format=date_format, errors='coerce').values
+                slow_rows = np.concatenate([slow_rows, reused + slow])
+                slow_values = np.concatenate([slow_values, raw])
+            result[reused:] = decoded
+
+        with self._lock:
+            self._text, self._result = text, result
+            self._slow_rows, self._slow_values = slow_rows, slow_values
+        return result
+
+
+_decoder = TimestampDecoder()
+
+
+# pd.to_datetime(values, format=date_format, errors='coerce') as a
+# datetime64[ns] array, memoized across calls through a shared decoder
+def parse_timestamps(values, date_format=DATE_FORMAT, decoder=None):
+    return (decoder or _decoder).decode(values, date_format)